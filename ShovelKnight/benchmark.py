@@ -0,0 +1,311 @@
+"""Headless benchmarks for the engine's hot paths.
+
+Run from anywhere:
+
+    python ShovelKnight/benchmark.py --json results.json
+    python ShovelKnight/benchmark.py --compare results.json
+
+Each benchmark times many samples of one operation under the SDL dummy
+drivers and reports mean and percentiles per operation. --json writes the
+results for later runs to --compare against; a p50 slower than the baseline
+by more than --threshold percent is reported as a regression and makes the
+run exit with status 1.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+from config import *
+from engine import *
+from enemy import Beeto, BeetoBatch
+import main
+import player
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def synthetic_level(width, beeto_every=6):
+    """Level text of the given width: ground with spike pits, platforms, ladders and Beetos."""
+    rows = [[' '] * width for _ in range(15)]
+
+    for x in range(width):
+        pit = x > 10 and 30 <= x % 40 < 34
+        if pit:
+            rows[14][x] = 'M'
+        else:
+            rows[11][x] = '='
+            rows[12][x] = '|'
+            rows[13][x] = rows[14][x] = '.'
+            if x > 8 and x % beeto_every == 3:
+                rows[10][x] = 'B'
+
+        if 8 <= x % 20 < 14:
+            rows[6][x] = '='
+        elif x % 20 == 14:
+            for y in range(6, 11):
+                rows[y][x] = 'H'
+
+    rows[10][2] = 'P'
+    rows[10][width - 3] = 'W'
+    return '\n'.join(''.join(row) for row in rows)
+
+
+class BenchmarkGame(main.ShovelKnight):
+    """The game, but with level numbers mapped onto any level files."""
+    levels = {}
+    prefetch_levels = False  # a worker thread building levels would skew the timings
+
+    def level_file(self, level_num):
+        return self.levels.get(level_num, super().level_file(level_num))
+
+    def find_max_level(self):
+        return max(self.levels, default=1)
+
+
+@contextlib.contextmanager
+def quiet():
+    # The game prints a lot; keep it out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def measure(fn, runs, inner=1, setup=None):
+    """Seconds per call of fn, one sample per run averaged over inner calls."""
+    samples = []
+    with quiet():
+        for _ in range(runs):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            for _ in range(inner):
+                fn()
+            samples.append((time.perf_counter() - start) / inner)
+    return samples
+
+
+def summarize(name, samples, inner):
+    ms = sorted(sample * 1000 for sample in samples)
+    if len(ms) > 1:
+        cuts = statistics.quantiles(ms, n=100, method='inclusive')
+    else:
+        cuts = ms * 99
+    return {
+        'name': name,
+        'runs': len(ms),
+        'inner': inner,
+        'mean_ms': statistics.fmean(ms),
+        'min_ms': ms[0],
+        'p50_ms': cuts[49],
+        'p90_ms': cuts[89],
+        'p99_ms': cuts[98],
+        'max_ms': ms[-1],
+    }
+
+
+class Suite:
+    def __init__(self, synthetic_widths=(1000, 5000), runs=200, pattern=None):
+        self.synthetic_widths = synthetic_widths
+        self.runs = runs
+        self.pattern = pattern
+        self.results = []
+
+        self.tmp = tempfile.TemporaryDirectory(prefix='sk-bench-')  # removed with the suite
+        self.levels = {}  # name -> level file
+        for i in range(1, 6):
+            path = f'ShovelKnight/assets/levels/level_{i}.txt'
+            if os.path.exists(path):
+                self.levels[f'level_{i}'] = path
+        for width in synthetic_widths:
+            path = os.path.join(self.tmp.name, f'synthetic_{width}.txt')
+            with open(path, 'w') as file:
+                file.write(synthetic_level(width))
+            self.levels[f'synthetic_{width}'] = path
+
+        BenchmarkGame.levels = dict(enumerate(self.levels.values(), 1))
+        with quiet():
+            self.game = BenchmarkGame(TITLE, WINDOW_SIZE, fps=FPS, headless=True)
+            self.game.init()
+
+    def wanted(self, name):
+        return self.pattern is None or self.pattern in name
+
+    def share(self, divisor):
+        """runs / divisor samples, at least one, for benchmarks too slow to take runs of."""
+        return max(1, self.runs // divisor)
+
+    def add(self, name, fn, runs=None, inner=1, setup=None):
+        if not self.wanted(name):
+            return
+        samples = measure(fn, runs or self.runs, inner, setup)
+        result = summarize(name, samples, inner)
+        self.results.append(result)
+        print(format_result(result), flush=True)
+
+    def build_level(self, path):
+        with quiet():
+            return self.game.build_level(path)
+
+    def level_build(self):
+        for name, path in self.levels.items():
+            # A fraction of the runs: building is slow, the synthetic levels most of all
+            runs = self.share(10 if name.startswith('synthetic') else 4)
+            self.add(f'level_build[{name}]', lambda path=path: self.game.build_level(path), runs=runs)
+
+    def collisions(self):
+        for name in ('level_1', f'synthetic_{self.synthetic_widths[-1]}'):
+            if name not in self.levels or not self.wanted('collisions'):
+                continue
+            level = self.build_level(self.levels[name])
+            rnd = random.Random(1)
+            knight = player.Knight(Rect(0, 0, 34, 31))
+            w, h = level.w * 16, level.h * 16
+            positions = [(rnd.randrange(w), rnd.randrange(h)) for _ in range(1024)]
+
+            def collide(positions=itertools.cycle(positions), tiles=level.tiles):
+                knight.rect.topleft = next(positions)
+                knight.collisions(tiles)
+
+            self.add(f'collisions[{name}]', collide, inner=100)
+
+    def moves(self):
+        for name in ('level_1', f'synthetic_{self.synthetic_widths[-1]}'):
+            if name not in self.levels or not self.wanted('move'):
+                continue
+            level = self.build_level(self.levels[name])
+            knight = level.entities[0]
+            beetos = [entity for entity in level.entities if isinstance(entity, Beeto)]
+
+            # Walk right, so the knight keeps meeting tiles
+            with quiet():
+                knight.on_event(pg.event.Event(KEYDOWN, key=K_d))
+            self.add(f'knight_move[{name}]', lambda: knight.move(level.tiles), inner=10)
+
+            if not beetos:
+                continue
+
+            # Per-Beeto path; the batch, when there is one, is left idle
+            def move_beetos():
+                for beeto in beetos:
+                    beeto.move(level.tiles)
+
+            self.add(f'beeto_move[{name}] x{len(beetos)}', move_beetos, runs=self.share(4))
+            if level.enemy_batch is not None:
+                self.add(f'beeto_batch_step[{name}] x{len(beetos)}', level.enemy_batch.step, runs=self.share(4))
+
+    def animation(self):
+        walk = Playback(player.load_animations()['walk'])
+        self.add('animation_advance', lambda: walk.advance(1 / FPS), inner=1000)
+
+    def frames(self):
+        game = self.game
+        for num, name in enumerate(self.levels, 1):
+            if not (self.wanted(f'update[{name}]') or self.wanted(f'frame[{name}]')):
+                continue
+
+            def start():
+                game.reset_game(num)
+                game.player.on_event(pg.event.Event(KEYDOWN, key=K_d))
+
+            def restart_if_over():
+                if game.game_state != "running":
+                    start()
+
+            with quiet():
+                start()
+            self.add(f'update[{name}]', game.update, setup=restart_if_over)
+
+            def frame():
+                game.save_state()
+                game.update()
+                game.draw()
+                game.present()
+
+            with quiet():
+                start()
+            self.add(f'frame[{name}]', frame, setup=restart_if_over)
+
+    def run(self):
+        self.level_build()
+        self.collisions()
+        self.moves()
+        self.animation()
+        self.frames()
+        return self.results
+
+
+def format_result(result):
+    return (f"{result['name']:<44}{result['runs']:>6}"
+            + ''.join(f"{result[key]:>11.4f}" for key in ('mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms')))
+
+
+def header():
+    return f"{'benchmark':<44}{'runs':>6}" + ''.join(f'{key:>11}' for key in ('mean ms', 'p50', 'p90', 'p99', 'max'))
+
+
+def compare(results, baseline, threshold):
+    """Print p50 changes against a baseline file; returns the names that regressed."""
+    with open(baseline) as file:
+        before = {result['name']: result for result in json.load(file)['results']}
+
+    regressions = []
+    print(f"\n{'benchmark':<44}{'base p50':>11}{'p50':>11}{'change':>9}")
+    for result in results:
+        old = before.get(result['name'])
+        if old is None or not old['p50_ms']:
+            continue
+        change = (result['p50_ms'] / old['p50_ms'] - 1) * 100
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(result['name'])
+        print(f"{result['name']:<44}{old['p50_ms']:>11.4f}{result['p50_ms']:>11.4f}{change:>+8.1f}%{flag}")
+    return regressions
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the engine hot paths headlessly')
+    parser.add_argument('--json', metavar='PATH', help='write the results to PATH')
+    parser.add_argument('--compare', metavar='PATH', help='compare p50 times with an earlier --json file')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='percent slower than the baseline p50 that counts as a regression')
+    parser.add_argument('--filter', metavar='TEXT', help='only run benchmarks whose name contains TEXT')
+    parser.add_argument('--runs', type=int, default=200, help='samples per benchmark; level builds and Beeto moves take a fraction of this')
+    parser.add_argument('--width', type=int, nargs='+', default=[1000, 5000],
+                        help='column counts of the synthetic levels')
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    print(header())
+    suite = Suite(tuple(args.width), runs=args.runs, pattern=args.filter)
+    results = suite.run()
+
+    if args.json:
+        meta = {
+            'python': platform.python_version(),
+            'pygame': pg.version.ver,
+            'numpy': BeetoBatch.supported,
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        with open(args.json, 'w') as file:
+            json.dump({'meta': meta, 'results': results}, file, indent=2)
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
@@ -4,8 +4,15 @@ from engine import *
 class Camera:
     def __init__(self, pos=[0, 0]):
         self.pos = pos
+        self.prev_pos = list(pos)
         self.vx = 0
 
+    def save_state(self):
+        self.prev_pos = list(self.pos)
+
+    def lerp_pos(self, alpha=1.0):
+        return [p + (c - p)*alpha for p, c in zip(self.prev_pos, self.pos)]
+
     def move(self, player):
         self.pos[0] += self.vx*dt
 
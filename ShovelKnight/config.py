@@ -1,3 +1,7 @@
 FPS = 60
 WINDOW_SIZE = (800, 480)
 TITLE = 'Shovel Knight'
+# Merge runs of solid level tiles into larger collision rects
+MERGE_TILES = True
+# Entities further than this many pixels outside the camera view are suspended
+ACTIVE_MARGIN = 128
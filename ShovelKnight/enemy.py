@@ -1,5 +1,13 @@
 from engine import *
+from engine.assets import assets
+from engine.debug import debug
 from engine.entity import Entity
+from engine.spatial import LADDER
+
+try:
+    import numpy as np
+except ImportError:  # optional: without it every Beeto moves itself
+    np = None
 
 sprites = SpriteSheet('ShovelKnight/assets/images/beeto.png', {
     'idle': (2, 2, 26, 16),
@@ -7,21 +15,28 @@ sprites = SpriteSheet('ShovelKnight/assets/images/beeto.png', {
     'flip': (2, 20, 26, 16),
 })
 
-animations = {
-    'walk': Animation(sprites.animation_sprites('walk'), 1, repeat=True),
-}
+
+def load_animations():
+    return {
+        'walk': AnimationClip(sprites.animation_sprites('walk'), 1, repeat=True),
+    }
 
 
 class Beeto(Entity):
     def __init__(self, rect=(0, 0, 0, 0)):
-        super().__init__(rect, sprites=sprites, animations=animations)
+        super().__init__(rect, sprites=sprites, animations=assets.memo('beeto_animations', load_animations))
         self.set_sprite('idle')
         self.set_animation('walk')
         self.vx = 5
         
         self.health = 1
         self.dead = False
-        self.debug_mode = False
+        self.batch = None  # BeetoBatch that moves this Beeto, if any
+
+    def update(self, tiles, elapsed):
+        if self.batch is None:
+            self.move(tiles)
+        self.animate(elapsed)
 
     def move(self, tiles):
         if self.dead:
@@ -36,12 +51,12 @@ class Beeto(Entity):
 
         for tile in hit_list:
             if self.vx > 0:
-                if tile.type != 'ladder':
-                    self.rect.right = tile.rect.left
+                if tile.code != LADDER:
+                    self.rect.right = tile.left
                     self.collision['right'] = True
             elif self.vx < 0:
-                if tile.type != 'ladder':
-                    self.rect.left = tile.rect.right
+                if tile.code != LADDER:
+                    self.rect.left = tile.right
                     self.collision['left'] = True
 
         if self.collision['right'] or self.collision['left'] or self.rect.x < 0:
@@ -55,34 +70,182 @@ class Beeto(Entity):
         
         for tile in hit_list:
             if self.vy > 0:
-                if tile.type != 'ladder':
-                    self.rect.bottom = tile.rect.top
+                if tile.code != LADDER:
+                    self.rect.bottom = tile.top
                     self.collision['bottom'] = True
                     self.vy = 0
             elif self.vy < 0:
-                if tile.type != 'ladder':
-                    self.rect.top = tile.rect.bottom
+                if tile.code != LADDER:
+                    self.rect.top = tile.bottom
                     self.collision['top'] = True
                     self.vy = 0
                     
     def die(self):
-        if self.debug_mode:
-            print("Enemy died!")
+        if debug.enabled:
+            debug.log("Enemy died!")
         self.dead = True
-        # Remove enemy from level.entities to properly despawn
-        if hasattr(self, 'level') and hasattr(self.level, 'entities'):
-            if self in self.level.entities:
-                self.level.entities.remove(self)
+        if self.batch is not None:
+            self.batch.remove(self)
+        # Remove enemy from the level to properly despawn
+        if hasattr(self, 'level') and hasattr(self.level, 'remove'):
+            self.level.remove(self)
                 
     def take_damage(self, damage):
         if self.dead:
             return
             
-        print(f"Enemy taking {damage} damage! Current health: {self.health}")
+        if debug.enabled:
+            debug.log(f"Enemy taking {damage} damage! Current health: {self.health}")
         self.health -= damage
         if self.health <= 0:
             self.die()
         return True
 
+    def debug_info(self):
+        return [(self.rect, (255, 80, 0), 1, None)], f"HP {self.health}", (255, 255, 255)
+
     def on_event(self, event):
-        pass
\ No newline at end of file
+        pass
+
+
+def round_like_rect(values):
+    # Rect attributes round float assignments half away from zero
+    return np.where(values >= 0, np.floor(values + 0.5), np.ceil(values - 0.5)).astype(np.int64)
+
+
+class BeetoBatch:
+    """Moves every Beeto of a level in one vectorized step.
+
+    Positions, velocities and flags live in NumPy arrays and tile collisions
+    are looked up in a boolean grid of solid cells, following Beeto.move:
+    the last solid tile hit (in row-major order) resolves horizontal motion
+    and the first one resolves vertical motion.
+
+    The grid only knows cells, so a Beeto is pushed out to the edge of the
+    cell it hit. With one tile per cell that is exactly what Beeto.move
+    does. With merged tiles (MERGE_TILES), Beeto.move pushes out to the
+    edge of the merged rect instead. The two only differ when a Beeto is
+    wedged into a gap narrower than itself.
+
+    The NumPy overhead only pays off with many Beetos; levels with fewer
+    than min_size move them one by one.
+    """
+
+    supported = np is not None
+    min_size = 64  # around where one batched step gets cheaper than per-Beeto moves
+
+    def __init__(self, beetos, tiles, size, cell_size=16):
+        self.beetos = list(beetos)
+        self.cell_size = cell_size
+
+        self.x = np.array([b.rect.x for b in self.beetos], dtype=np.int64)
+        self.y = np.array([b.rect.y for b in self.beetos], dtype=np.int64)
+        self.w = np.array([b.rect.width for b in self.beetos], dtype=np.int64)
+        self.h = np.array([b.rect.height for b in self.beetos], dtype=np.int64)
+        self.vx = np.array([b.vx for b in self.beetos], dtype=np.float64)
+        self.vy = np.array([b.vy for b in self.beetos], dtype=np.float64)
+        self.flip = np.array([b.flip for b in self.beetos], dtype=bool)
+        self.alive = np.array([not b.dead for b in self.beetos], dtype=bool)
+        self.index = {id(b): i for i, b in enumerate(self.beetos)}
+
+        # Solid cells of the level; ladders never block a Beeto
+        cols, rows = size
+        self.solid = np.zeros((rows, cols), dtype=bool)
+        for tile in tiles:
+            if tile.code != LADDER:
+                self.solid[tile.top // cell_size:(tile.bottom - 1) // cell_size + 1,
+                           tile.left // cell_size:(tile.right - 1) // cell_size + 1] = True
+
+        # Most cells a Beeto can overlap along each axis
+        self.span_x = int((self.w.max(initial=1) + cell_size - 2) // cell_size + 1)
+        self.span_y = int((self.h.max(initial=1) + cell_size - 2) // cell_size + 1)
+
+        for b in self.beetos:
+            b.batch = self
+
+    def remove(self, beeto):
+        self.alive[self.index[id(beeto)]] = False
+
+    def mask(self, beetos):
+        """Boolean mask selecting the given Beetos of this batch, for step(active=...)."""
+        active = np.zeros(len(self.beetos), dtype=bool)
+        active[[self.index[id(b)] for b in beetos if getattr(b, 'batch', None) is self]] = True
+        return active
+
+    def hits(self, x, y, w, h):
+        """Yield (hit mask, cell column, cell row) per candidate cell in row-major order."""
+        size = self.cell_size
+        rows, cols = self.solid.shape
+        c0, c1 = x // size, (x + w - 1) // size
+        r0, r1 = y // size, (y + h - 1) // size
+
+        for dr in range(self.span_y):
+            r = r0 + dr
+            for dc in range(self.span_x):
+                c = c0 + dc
+                inside = (r <= r1) & (c <= c1) & (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+                hit = np.zeros(len(x), dtype=bool)
+                hit[inside] = self.solid[r[inside], c[inside]]
+                yield hit, c, r
+
+    def step(self, active=None):
+        """Advance alive Beetos, or only those selected by the boolean mask active."""
+        mask = self.alive if active is None else self.alive & active
+        idx = np.flatnonzero(mask)
+        if not len(idx):
+            return
+
+        size = self.cell_size
+        w, h = self.w[idx], self.h[idx]
+        vx, vy = self.vx[idx], self.vy[idx]
+        flip = self.flip[idx]
+
+        # Horizontal step; the last tile hit decides where the Beeto ends up
+        x = round_like_rect(self.x[idx] + vx * dt)
+        y = self.y[idx]
+        edge = np.zeros(len(idx), dtype=np.int64)
+        hit_any = np.zeros(len(idx), dtype=bool)
+        for hit, c, r in self.hits(x, y, w, h):
+            edge = np.where(hit, c * size, edge)
+            hit_any |= hit
+
+        right = hit_any & (vx > 0)
+        left = hit_any & (vx < 0)
+        x = np.where(right, edge - w, x)
+        x = np.where(left, edge + size, x)
+
+        turn = right | left | (x < 0)
+        vx = np.where(turn, -vx, vx)
+        flip = flip ^ turn
+
+        # Vertical step; the first tile hit stops the fall
+        y = round_like_rect(y + vy * dt)
+        vy = vy + 0.5 * g * dt**2
+        edge = np.zeros(len(idx), dtype=np.int64)
+        hit_any = np.zeros(len(idx), dtype=bool)
+        for hit, c, r in self.hits(x, y, w, h):
+            first = hit & ~hit_any
+            edge = np.where(first, r * size, edge)
+            hit_any |= hit
+
+        bottom = hit_any & (vy > 0)
+        top = hit_any & (vy < 0)
+        y = np.where(bottom, edge - h, y)
+        y = np.where(top, edge + size, y)
+        vy = np.where(bottom | top, 0.0, vy)
+
+        self.x[idx], self.y[idx] = x, y
+        self.vx[idx], self.vy[idx] = vx, vy
+        self.flip[idx] = flip
+
+        beetos = self.beetos
+        for i, bx, by, bvx, bvy, bflip, r, l, b, t in zip(
+                idx.tolist(), x.tolist(), y.tolist(), vx.tolist(), vy.tolist(), flip.tolist(),
+                right.tolist(), left.tolist(), bottom.tolist(), top.tolist()):
+            beeto = beetos[i]
+            beeto.rect.x = bx
+            beeto.rect.y = by
+            beeto.vx = bvx
+            beeto.vy = bvy
+            beeto.flip = bflip
+            beeto.collision = {'left': l, 'right': r, 'top': t, 'bottom': b}
@@ -6,12 +6,30 @@ import pygame.mixer as pg_mixer
 import pygame.time as pg_time
 import pygame.transform as pg_transform
 
+from pygame import Rect
 from pygame.surface import Surface
-from pygame.locals import *
+from pygame.locals import (
+    QUIT, KEYDOWN, KEYUP, SRCALPHA,
+    K_a, K_d, K_f, K_q, K_r, K_s, K_w, K_SPACE, K_ESCAPE, K_F3, K_F4,
+)
 
-from .animation import Animation
+from .animation import AnimationClip, Playback
 from .game import Game
 from .physics import g, dt
 from .sprite_sheet import SpriteSheet
-from .level import Level
 # from .entity import Entity
+
+__all__ = [
+    'pg', 'pg_display', 'pg_event', 'pg_image', 'pg_mixer', 'pg_time', 'pg_transform',
+    'Rect', 'Surface', 'QUIT', 'KEYDOWN', 'KEYUP', 'SRCALPHA',
+    'K_a', 'K_d', 'K_f', 'K_q', 'K_r', 'K_s', 'K_w', 'K_SPACE', 'K_ESCAPE', 'K_F3', 'K_F4',
+    'AnimationClip', 'Playback', 'Game', 'g', 'dt', 'SpriteSheet',
+]
+
+
+def __getattr__(name):
+    # Level pulls in the game's entities, so only import it when asked for
+    if name == 'Level':
+        from .level import Level
+        return Level
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,90 @@
+from pygame import Rect
+
+
+class Activation:
+    """Keeps the entities near the camera awake and suspends the rest.
+
+    An entity is awake while its rect overlaps the camera view grown by
+    margin on every side. Entities are bucketed by the column of their left
+    edge; only awake entities move, so only they are re-bucketed, and finding
+    who is awake visits just the buckets around the view. Frame cost then
+    follows what is near the camera rather than the level's population.
+    Entities are assumed to be narrower than a bucket.
+    """
+
+    def __init__(self, entities=(), margin=128, bucket_size=256):
+        self.margin = margin
+        self.bucket_size = bucket_size
+        self.order = {}  # entity -> spawn order, so awake entities update in level order
+        self.buckets = {}  # column -> set of entities
+        self.column = {}  # entity -> its bucket column
+        self.columns = range(0)  # bucket columns that have ever held an entity
+        self.pinned = set()  # always awake, e.g. the player
+        self.awake = []
+        self.awake_set = set()
+        self.region = Rect(0, 0, 0, 0)
+
+        for entity in entities:
+            self.add(entity)
+
+    def add(self, entity):
+        self.order.setdefault(entity, len(self.order))
+        self.place(entity)
+
+    def remove(self, entity):
+        column = self.column.pop(entity, None)
+        if column is not None:
+            self.buckets[column].discard(entity)
+        self.pinned.discard(entity)
+        if entity in self.awake_set:
+            self.awake_set.discard(entity)
+            self.awake = [other for other in self.awake if other is not entity]
+
+    def pin(self, entity):
+        self.pinned.add(entity)
+
+    def place(self, entity):
+        column = entity.rect.x // self.bucket_size
+        previous = self.column.get(entity)
+        if previous == column:
+            return
+
+        if previous is not None:
+            self.buckets[previous].discard(entity)
+        self.buckets.setdefault(column, set()).add(entity)
+        self.column[entity] = column
+        if self.columns:
+            self.columns = range(min(self.columns.start, column), max(self.columns.stop, column + 1))
+        else:
+            self.columns = range(column, column + 1)
+
+    def update(self, view):
+        """Work out who is awake for a camera view and return them in level order.
+
+        Entities that just woke up save their state, so they resume drawing
+        from where they are instead of interpolating from where they slept.
+        """
+        size = self.bucket_size
+        region = self.region = Rect(view).inflate(2*self.margin, 2*self.margin)
+
+        awake = set(entity for entity in self.pinned if entity in self.column)
+        # One extra bucket on the left for entities sticking out of it into the region
+        first = max((region.left - size) // size, self.columns.start)
+        last = min((region.right - 1) // size, self.columns.stop - 1)
+        for column in range(first, last + 1):
+            for entity in self.buckets.get(column, ()):
+                if entity.rect.colliderect(region):
+                    awake.add(entity)
+
+        for entity in awake - self.awake_set:
+            entity.save_state()
+
+        self.awake_set = awake
+        self.awake = sorted(awake, key=self.order.__getitem__)
+        return self.awake
+
+    def moved(self):
+        """Re-bucket the awake entities after they have been updated."""
+        for entity in self.awake:
+            if entity in self.column:
+                self.place(entity)
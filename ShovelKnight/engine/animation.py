@@ -1,41 +1,70 @@
-FPS = 60
+import math
 
+# Slack for float error when elapsed time lands exactly on a frame boundary
+EPSILON = 1e-9
+
+
+class AnimationClip:
+    """What an animation shows: its frames, how long they take and the flip offset.
+
+    Clips are immutable, so every entity of a type can share one; each
+    entity plays it through its own Playback. The one exception is the
+    contents of frames: it is the sprite sheet's own list, and
+    SpriteSheet.refresh() swaps in display-format copies of the same frames
+    in place after assets.convert(). Its length never changes, so nframes
+    and frame_time stay right, and clips and playbacks already handed out
+    pick up the converted surfaces.
+    """
+    __slots__ = ('frames', 'duration', 'repeat', 'flip_offset', 'nframes', 'frame_time')
 
-class Animation:
     def __init__(self, frames, duration, repeat=False, flip_offset=(0, 0)):
-        self.i = 0  # animation frame index
-        self.j = 0  # game frame index
-        self.nframes = len(frames)  # number of animation frames
-        # update animation frame every k frames
-        self.k = int(FPS / self.nframes * duration)
+        object.__setattr__(self, 'frames', frames)
+        object.__setattr__(self, 'duration', duration)  # seconds for all frames
+        object.__setattr__(self, 'repeat', repeat)
+        object.__setattr__(self, 'flip_offset', flip_offset)
+        object.__setattr__(self, 'nframes', len(frames))
+        object.__setattr__(self, 'frame_time', duration / len(frames))  # seconds per frame
 
-        self.stopped = False
-        self.flip_offset = flip_offset
+    def __setattr__(self, name, value):
+        raise AttributeError('AnimationClip is immutable')
 
-        self.frames = frames  # animation frames
-        self.repeat = repeat  # repeat animation
-        
+    def __repr__(self):
+        return f"<AnimationClip {self.nframes} frames over {self.duration}s repeat={self.repeat}>"
 
-    def tick(self):
-        if not self.stopped:
-            if self.j == 0:
-                self.i += 1
 
-            self.j += 1
+class Playback:
+    """One entity's position in an AnimationClip, advanced by elapsed time.
 
-            if not self.repeat and self.i == self.nframes:
-                self.stopped = True
+    Frame i is shown for the frame_time up to and including i * frame_time,
+    so the first advance() already moves off frame 0. A clip that doesn't
+    repeat stops once its last frame comes up.
+    """
+    __slots__ = ('clip', 'time', 'i', 'stopped')
 
-            self.i %= self.nframes
-            self.j %= self.k
+    def __init__(self, clip):
+        self.clip = clip
+        self.reset()
+
+    def advance(self, elapsed):
+        if self.stopped:
+            return
+
+        clip = self.clip
+        self.time += elapsed
+        i = math.ceil(self.time / clip.frame_time - EPSILON)
+        if i >= clip.nframes:
+            if not clip.repeat:
+                self.stopped = True
+                self.time = 0.0
+            elif i > clip.nframes:
+                # Past the end of a cycle; only keep the time into the next one
+                self.time -= clip.duration
+        self.i = i % clip.nframes
 
     def reset(self):
-        self.i = 0
-        self.j = 0
+        self.time = 0.0  # seconds into the clip
+        self.i = 0  # frame index
         self.stopped = False
 
     def frame(self):
-        return self.frames[self.i]
-    
-
-
+        return self.clip.frames[self.i]
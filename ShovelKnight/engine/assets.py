@@ -0,0 +1,115 @@
+from collections import Counter
+import os
+
+import pygame as pg
+import pygame.display as pg_display
+import pygame.image as pg_image
+import pygame.mixer as pg_mixer
+
+
+class Assets:
+    """Loads every image and sound file once and keeps it for the whole run.
+
+    Nothing is loaded until first asked for. Images loaded before the display
+    exists are converted to its pixel format by convert(), which Game calls
+    right after set_mode. Sprite sheets register themselves so their memoized
+    sprites can be rebuilt from the converted image.
+    """
+
+    def __init__(self):
+        self.images = {}  # path -> Surface
+        self.sounds = {}  # (path, volume) -> Sound
+        self.memos = {}  # key -> value derived from images, e.g. a scaled door
+        self.sheets = []
+        self.converted = False
+
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def hit(self, kind):
+        self.hits[kind] += 1
+
+    def miss(self, kind):
+        self.misses[kind] += 1
+
+    def image(self, path):
+        key = os.path.normpath(path)
+        image = self.images.get(key)
+        if image is None:
+            self.miss('image')
+            image = pg_image.load(key)
+            if self.converted:
+                image = self.to_display_format(image)
+            self.images[key] = image
+        else:
+            self.hit('image')
+
+        return image
+
+    def sound(self, path, volume=None):
+        key = (os.path.normpath(path), volume)
+        sound = self.sounds.get(key)
+        if sound is None:
+            self.miss('sound')
+            base = self.sounds.get((key[0], None))
+            if base is None:
+                base = pg_mixer.Sound(key[0])
+                self.sounds[(key[0], None)] = base
+
+            if volume is None:
+                sound = base
+            else:
+                # Decoded samples are copied so each volume gets its own Sound
+                sound = pg_mixer.Sound(buffer=base.get_raw())
+                sound.set_volume(volume)
+            self.sounds[key] = sound
+        else:
+            self.hit('sound')
+
+        return sound
+
+    def memo(self, key, build):
+        """Cache a value derived from assets, such as a rescaled sprite."""
+        value = self.memos.get(key)
+        if value is None:
+            self.miss('memo')
+            value = self.memos[key] = build()
+        else:
+            self.hit('memo')
+
+        return value
+
+    def add_sheet(self, sheet):
+        self.sheets.append(sheet)
+
+    @staticmethod
+    def to_display_format(image):
+        if image.get_flags() & pg.SRCALPHA:
+            return image.convert_alpha()
+        return image.convert()
+
+    def convert(self):
+        """Convert every loaded image to the display pixel format."""
+        if pg_display.get_surface() is None:
+            return
+
+        for key, image in self.images.items():
+            self.images[key] = self.to_display_format(image)
+
+        self.converted = True
+        self.memos.clear()
+        for sheet in self.sheets:
+            sheet.refresh()
+
+    def stats(self):
+        kinds = sorted(set(self.hits) | set(self.misses))
+        return {
+            'images': len(self.images),
+            'sounds': len(self.sounds),
+            'converted': self.converted,
+            'cache': {kind: {'hits': self.hits[kind], 'misses': self.misses[kind]}
+                      for kind in kinds},
+        }
+
+
+assets = Assets()
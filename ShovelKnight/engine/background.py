@@ -0,0 +1,57 @@
+import pygame as pg
+import pygame.display as pg_display
+import pygame.transform as pg_transform
+from pygame import Rect
+from pygame.surface import Surface
+
+
+class Background:
+    """Parallax background layers, scaled and converted once per resolution.
+
+    Each layer is stretched to the view size and tiled into a strip two views
+    wide, so drawing a scrolled layer is a single blit out of the strip.
+    """
+
+    def __init__(self):
+        self.layers = []  # (image, parallax)
+        self.strips = {}  # (layer index, view size) -> Surface
+
+    def add_layer(self, image, parallax=0.0):
+        """parallax is how far the layer scrolls per pixel of camera movement."""
+        self.layers.append((image, parallax))
+
+    def strip(self, i, size):
+        key = (i, size)
+        strip = self.strips.get(key)
+        if strip is None:
+            image, parallax = self.layers[i]
+            w, h = size
+            tile = pg_transform.scale(image, size)
+
+            # The back layer covers the whole view, layers in front of it keep their alpha
+            opaque = i == 0
+
+            if parallax:
+                strip = Surface((w * 2, h), 0 if opaque else pg.SRCALPHA)
+                strip.blit(tile, (0, 0))
+                strip.blit(tile, (w, 0))
+            else:
+                strip = tile
+
+            if pg_display.get_surface() is not None:
+                strip = strip.convert() if opaque else strip.convert_alpha()
+
+            self.strips[key] = strip
+
+        return strip
+
+    def draw(self, surface, camera_x=0):
+        size = surface.get_size()
+        w, h = size
+
+        for i, (image, parallax) in enumerate(self.layers):
+            strip = self.strip(i, size)
+            if parallax:
+                surface.blit(strip, (0, 0), Rect(int(camera_x * parallax) % w, 0, w, h))
+            else:
+                surface.blit(strip, (0, 0))
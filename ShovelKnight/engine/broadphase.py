@@ -0,0 +1,74 @@
+class SweepAndPrune:
+    """Broadphase that finds pairs of entities whose bounds overlap.
+
+    Entities stay sorted by the left edge of their bounds between updates, so
+    re-sorting after a frame of movement is an almost free insertion sort. The
+    sweep then only compares entities whose x ranges overlap, and the cost
+    grows with the number of actual overlaps instead of with n squared.
+
+    Gameplay code subscribes with on_pair(kind_a, kind_b, callback); every
+    overlapping pair of an instance of kind_a and one of kind_b is passed to
+    callback(a, b) in that order.
+    """
+
+    def __init__(self):
+        self.order = []  # entities sorted by bounds left
+        self.callbacks = []  # (kind_a, kind_b, callback)
+        self.pairs = []
+
+    def on_pair(self, kind_a, kind_b, callback):
+        self.callbacks.append((kind_a, kind_b, callback))
+
+    def sync(self, entities):
+        # Keep last frame's order for entities still there, new ones go last
+        members = set(entities)
+        order = [entity for entity in self.order if entity in members]
+        if len(order) != len(members):
+            known = set(order)
+            order.extend(entity for entity in entities if entity not in known)
+        self.order = order
+
+    def sort(self):
+        order = self.order
+        boxes = [entity.bounds() for entity in order]
+
+        for i in range(1, len(order)):
+            entity, box = order[i], boxes[i]
+            j = i - 1
+            while j >= 0 and boxes[j].left > box.left:
+                order[j + 1] = order[j]
+                boxes[j + 1] = boxes[j]
+                j -= 1
+            order[j + 1] = entity
+            boxes[j + 1] = box
+
+        return boxes
+
+    def find_pairs(self, boxes):
+        order = self.order
+        pairs = []
+        active = []  # indices whose bounds may still reach the sweep line
+
+        for i, box in enumerate(boxes):
+            left = box.left
+            active = [j for j in active if boxes[j].right > left]
+            for j in active:
+                if boxes[j].colliderect(box):
+                    pairs.append((order[j], order[i]))
+            active.append(i)
+
+        return pairs
+
+    def update(self, entities):
+        """Re-sort entities, collect overlapping pairs and run the callbacks."""
+        self.sync(entities)
+        self.pairs = self.find_pairs(self.sort())
+
+        for a, b in self.pairs:
+            for kind_a, kind_b, callback in self.callbacks:
+                if isinstance(a, kind_a) and isinstance(b, kind_b):
+                    callback(a, b)
+                elif isinstance(b, kind_a) and isinstance(a, kind_b):
+                    callback(b, a)
+
+        return self.pairs
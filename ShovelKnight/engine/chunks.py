@@ -0,0 +1,83 @@
+from collections import OrderedDict
+
+import pygame as pg
+from pygame import Rect
+from pygame.surface import Surface
+
+
+class ChunkedMap:
+    """Level map split into chunk surfaces that are rendered on first view.
+
+    blit() only records what goes where. A chunk surface is created the first
+    time draw() needs it and evicted, least recently used first, once the
+    chunks held exceed the memory budget.
+    """
+
+    def __init__(self, width, height, chunk_size=256, budget=4 * 1024 * 1024):
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.budget = budget  # bytes of chunk surfaces kept alive
+
+        self.draws = {}  # (cx, cy) -> [(sprite, (x, y))] in map coordinates
+        self.chunks = OrderedDict()  # (cx, cy) -> Surface, least recently used first
+        self.memory = 0
+
+    def get_size(self):
+        return (self.width, self.height)
+
+    def blit(self, sprite, pos):
+        size = self.chunk_size
+        w, h = sprite.get_size()
+        x, y = int(pos[0]), int(pos[1])
+
+        for cy in range(max(y, 0) // size, (min(y + h, self.height) - 1) // size + 1):
+            for cx in range(max(x, 0) // size, (min(x + w, self.width) - 1) // size + 1):
+                self.draws.setdefault((cx, cy), []).append((sprite, (x, y)))
+                # Drop a stale surface so the new tile shows up
+                self.evict((cx, cy))
+
+    def chunk(self, key):
+        surface = self.chunks.get(key)
+        if surface is not None:
+            self.chunks.move_to_end(key)
+            return surface
+
+        size = self.chunk_size
+        x0, y0 = key[0] * size, key[1] * size
+        surface = Surface((min(size, self.width - x0), min(size, self.height - y0)), pg.SRCALPHA)
+        for sprite, (x, y) in self.draws.get(key, ()):
+            surface.blit(sprite, (x - x0, y - y0))
+
+        self.chunks[key] = surface
+        self.memory += surface.get_width() * surface.get_height() * 4
+        return surface
+
+    def evict(self, key):
+        surface = self.chunks.pop(key, None)
+        if surface is not None:
+            self.memory -= surface.get_width() * surface.get_height() * 4
+
+    def draw(self, surface, pos, size):
+        """Blit the part of the map at pos with the given size onto surface at (0, 0)."""
+        origin = Rect(tuple(pos) + tuple(size))
+        view = origin.clip(Rect(0, 0, self.width, self.height))
+        if not view.width or not view.height:
+            return
+
+        csize = self.chunk_size
+        visible = []
+        for cy in range(view.top // csize, (view.bottom - 1) // csize + 1):
+            for cx in range(view.left // csize, (view.right - 1) // csize + 1):
+                # Chunks with nothing drawn on them stay fully transparent
+                if (cx, cy) not in self.draws:
+                    continue
+
+                chunk = self.chunk((cx, cy))
+                surface.blit(chunk, (cx * csize - origin.x, cy * csize - origin.y))
+                visible.append((cx, cy))
+
+        # Chunks used this frame are at the end of the LRU order, so they go last
+        while self.memory > self.budget and len(self.chunks) > len(visible):
+            key, chunk = self.chunks.popitem(last=False)
+            self.memory -= chunk.get_width() * chunk.get_height() * 4
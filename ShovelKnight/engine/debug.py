@@ -0,0 +1,88 @@
+import sys
+from collections import deque
+
+import pygame.draw as pg_draw
+import pygame.font as pg_font
+from pygame import Rect, SRCALPHA
+from pygame.surface import Surface
+
+from .hud import TextCache
+
+
+class DebugLog:
+    """Debug channel that costs nothing while disabled.
+
+    Callers check enabled before building a message (`if debug.enabled:
+    debug.log(...)`), so a disabled channel is one attribute test and no
+    formatting. Messages are buffered and written out together by flush(),
+    which the game loop calls once a frame, instead of one synchronous
+    print each. Past max_lines the oldest unflushed lines are dropped.
+    """
+
+    def __init__(self, enabled=False, stream=None, max_lines=1000):
+        self.enabled = enabled
+        self.stream = stream  # None writes to whatever sys.stdout is at flush time
+        self.lines = deque(maxlen=max_lines)
+
+    def log(self, message):
+        self.lines.append(message)
+
+    def flush(self):
+        if not self.lines:
+            return
+        stream = sys.stdout if self.stream is None else self.stream
+        stream.write('\n'.join(self.lines) + '\n')
+        stream.flush()
+        self.lines.clear()
+
+
+debug = DebugLog()
+
+
+class DebugOverlay:
+    """Draws every entity's debug boxes and label in one pass.
+
+    Entities describe themselves through debug_info(). The font is created
+    once, labels come from a TextCache and translucent fills reuse one
+    surface per size and colour, so an enabled overlay allocates next to
+    nothing per frame.
+    """
+
+    def __init__(self, font_size=12, text_cache=None):
+        self.font_size = font_size
+        self.font = None
+        self.text_cache = TextCache() if text_cache is None else text_cache
+        self.fills = {}  # (size, rgba) -> filled SRCALPHA surface
+        self.bounds = Rect(0, 0, 0, 0)  # area drawn by the last draw()
+        self.previous = Rect(0, 0, 0, 0)  # and by the one before
+
+    def fill(self, size, colour):
+        key = (size, colour)
+        surface = self.fills.get(key)
+        if surface is None:
+            surface = self.fills[key] = Surface(size, SRCALPHA)
+            surface.fill(colour)
+        return surface
+
+    def draw(self, surface, entities, offset=(0, 0)):
+        """Draw the overlay for entities; returns the rect it touched."""
+        if self.font is None:
+            self.font = pg_font.SysFont('Arial', self.font_size)
+
+        ox, oy = offset
+        drawn = []
+        for entity in entities:
+            boxes, label, label_colour = entity.debug_info()
+            for rect, colour, width, fill in boxes:
+                box = Rect(rect.x - ox, rect.y - oy, rect.width, rect.height)
+                drawn.append(pg_draw.rect(surface, colour, box, width))
+                if fill is not None:
+                    drawn.append(surface.blit(self.fill(box.size, fill), box.topleft))
+
+            if label:
+                text = self.text_cache.render(self.font, label, label_colour)
+                drawn.append(surface.blit(text, (entity.rect.x - ox, entity.rect.y - oy - 20)))
+
+        self.previous = self.bounds
+        self.bounds = drawn[0].unionall(drawn[1:]) if drawn else Rect(0, 0, 0, 0)
+        return self.bounds
@@ -0,0 +1,89 @@
+import pygame.transform as pg_transform
+from pygame import Rect
+
+
+class DirtyRects:
+    """Tracks which parts of the draw surface changed and presents only those.
+
+    Regions are in draw-surface coordinates; blit() scales each one up to
+    the screen on its own and returns just those screen rects. Anything that
+    invalidates the whole view, like a camera scroll, calls mark_all().
+    """
+
+    # Above this fraction of the surface a single full update is cheaper
+    full_threshold = 0.5
+
+    def __init__(self, surface_size, screen_size):
+        self.bounds = Rect((0, 0), surface_size)
+        self.scale = (screen_size[0] / surface_size[0], screen_size[1] / surface_size[1])
+        self.screen_size = screen_size
+        self.rects = []
+        self.full = True
+        self.previous = {}  # key -> (rect, state) as of the last frame
+        self.seen = set()
+
+    def mark(self, rect):
+        rect = Rect(rect).clip(self.bounds)
+        if rect.width and rect.height:
+            self.rects.append(rect)
+
+    def mark_all(self):
+        self.full = True
+
+    def track(self, key, rect, state=None):
+        """Mark rect when it moved or its state (e.g. sprite) changed since last frame."""
+        self.seen.add(key)
+        rect = Rect(rect)
+        previous = self.previous.get(key)
+        if previous == (rect, state):
+            return
+
+        if previous is not None:
+            self.mark(previous[0])
+        self.mark(rect)
+        self.previous[key] = (rect, state)
+
+    def end_frame(self):
+        # Whatever was tracked last frame but not this one has to be erased
+        for key in list(self.previous):
+            if key not in self.seen:
+                self.mark(self.previous.pop(key)[0])
+        self.seen.clear()
+
+    def merged(self):
+        rects = []
+        for rect in self.rects:
+            # Grow the rect until it no longer touches any already merged one
+            i = rect.collidelist(rects)
+            while i != -1:
+                rect = rect.union(rects.pop(i))
+                i = rect.collidelist(rects)
+            rects.append(rect)
+        return rects
+
+    def blit(self, surface, screen):
+        """Scale the changed regions of surface onto screen.
+
+        Returns the screen rects to update, or None when the whole screen was redrawn.
+        """
+        self.end_frame()
+
+        rects = [] if self.full else self.merged()
+        area = sum(r.width * r.height for r in rects)
+        updated = []
+        if self.full or area > self.full_threshold * self.bounds.width * self.bounds.height:
+            screen.blit(pg_transform.scale(surface, self.screen_size), (0, 0))
+            updated = None
+        else:
+            sx, sy = self.scale
+            for rect in rects:
+                target = Rect(int(rect.x * sx), int(rect.y * sy),
+                              int(rect.right * sx) - int(rect.x * sx),
+                              int(rect.bottom * sy) - int(rect.y * sy))
+                screen.blit(pg_transform.scale(surface.subsurface(rect), target.size), target)
+                updated.append(target)
+
+        self.rects = []
+        self.full = False
+        return updated
+
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from . import *
+from .spatial import TileStore
 
 
 class Entity(ABC):
@@ -7,35 +8,58 @@ class Entity(ABC):
         self.rect = rect
         self.flip = False
         self.sprite = None
+        self.sprite_key = None  # (sprite id or animation frame, flip) of self.sprite
+        self.drawn_sprite = None  # surface the last draw() blitted, which may differ from sprite
         self.sprites = sprites
-        self.animation = None
-        self.animations = animations
+        self.animation = None  # Playback of one of animations, or None
+        self.animations = animations  # name -> AnimationClip, shared by the entity type
         self.collision = {'left': False, 'right': False,
                           'top': False, 'bottom': False}
         self.vx = 0
         self.vy = 0
+        self.prev_pos = self.rect.topleft
 
-    def draw(self, surface, offset=(0, 0)):
-        pos = [self.rect.x-offset[0], self.rect.y-offset[1]]
+    def save_state(self):
+        self.prev_pos = self.rect.topleft
+
+    def lerp_pos(self, alpha=1.0):
+        """Position between the last saved state and the current one."""
+        x, y = self.prev_pos
+        return (x + (self.rect.x - x)*alpha, y + (self.rect.y - y)*alpha)
+
+    def draw(self, surface, offset=(0, 0), alpha=1.0):
+        x, y = self.lerp_pos(alpha)
+        pos = [x-offset[0], y-offset[1]]
 
         if self.flip == True and self.animation is not None:
             if self.animation.i != 0:
-                pos[0] -= self.animation.flip_offset[0]
+                pos[0] -= self.animation.clip.flip_offset[0]
 
-        surface.blit(self.sprite, pos)
+        self.drawn_sprite = self.sprite
+        return surface.blit(self.sprite, pos)
 
     def set_sprite(self, sprite_id=None):
         if sprite_id is None:
-            sprite = self.animation.frame()
+            source = self.animation.frame()
         else:
-            sprite = self.sprites.sprite(sprite_id)
+            source = sprite_id
 
-        if self.flip:
-            sprite = pg_transform.flip(sprite, 1, 0)
+        # Animation ticks that stay on the same frame keep the current surface
+        sprite_key = (source, self.flip)
+        if sprite_key == self.sprite_key:
+            return
 
-        self.sprite = sprite
+        self.sprite_key = sprite_key
+        self.sprite = self.sprites.variant(source, self.flip)
+
+    def bounds(self):
+        """Area this entity can interact with other entities in."""
+        return self.rect
 
     def collisions(self, tiles):
+        if isinstance(tiles, TileStore):
+            return tiles.query(self.rect)
+
         hit_list = []
 
         for tile in tiles:
@@ -43,9 +67,10 @@ class Entity(ABC):
                 hit_list.append(tile)
         return hit_list
 
-    def animate(self):
+    def animate(self, elapsed):
+        """Advance the animation by elapsed seconds of game time."""
         if self.animation is not None:
-            self.animation.tick()
+            self.animation.advance(elapsed)
             self.set_sprite()
 
             if self.animation.stopped == True:
@@ -53,12 +78,22 @@ class Entity(ABC):
                 self.set_sprite('idle')
 
     def set_animation(self, animation_id):
-        self.animation = self.animations[animation_id]
-        self.animation.reset()
+        self.animation = Playback(self.animations[animation_id])
 
-    def update(self, tiles):
+    def update(self, tiles, elapsed):
+        """One simulation step, which covers elapsed seconds of game time."""
         self.move(tiles)
-        self.animate()
+        self.animate(elapsed)
+
+    def debug_info(self):
+        """What the debug overlay shows: ([(rect, colour, line width, fill rgba or None)], label, label colour)."""
+        return [(self.rect, (0, 255, 0), 1, None)], None, None
+
+    def on_enter(self, volume):
+        """Called when this entity starts overlapping a trigger volume."""
+
+    def on_exit(self, volume):
+        """Called when this entity stops overlapping a trigger volume."""
 
     @abstractmethod
     def on_event(self, event):
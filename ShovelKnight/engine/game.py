@@ -1,9 +1,16 @@
 from abc import ABC, abstractmethod
+import os
 import sys
+import time
 
 from config import *
 
 from . import *
+from .assets import assets
+from .debug import debug
+from .dirty import DirtyRects
+from .input import inputs
+from .startup import PhaseTimer
 
 
 WHITE = (255, 255, 255)
@@ -11,52 +18,268 @@ BLACK = (0, 0, 0)
 RED = (255, 0, 0)
 
 class Game(ABC):
-    def __init__(self, title, window_size, fps=60):
+    # Most simulation steps run per rendered frame before the backlog is dropped
+    max_catch_up_steps = 5
+
+    # Keys that show the frame-time graph and dump the profile, when profiling
+    profiler_keys = (K_F3, K_F4)
+    profile_path = 'frame_profile.csv'
+
+    def __init__(self, title, window_size, fps=60, headless=False, render_fps=None, startup=None,
+                 dirty_rects=False, profiler=None):
+        self.startup = PhaseTimer() if startup is None else startup
         self.title = title
         self.window_size = window_size
-        self.fps = fps
+        self.fps = fps  # simulation steps per second
+        self.step_time = 1 / fps  # seconds of game time each step() covers
+        self.render_fps = fps if render_fps is None else render_fps  # 0 = uncapped
+        self.headless = headless
+        self.alpha = 1.0  # fraction of a step between the saved and current state
+
+        if headless:
+            # Must be set before SDL initialises its subsystems
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
 
         pg_mixer.pre_init(44100, -16, 1, 512)
         pg_mixer.init()
         pg.init()
+        self.startup.mark('pygame init')
+
+        # One pump a frame, of just the events the game handles
+        self.input = inputs
+        self.input.allow()
 
         pg_display.set_caption(title)
 
         self.screen = pg_display.set_mode(window_size)
+        # Anything loaded before the display existed still has the file's pixel format
+        assets.convert()
+        self.startup.mark('display')
         self.surface = Surface(tuple((i/2 for i in window_size)))
+        # Present only the regions draw() reported as changed
+        self.dirty = DirtyRects(self.surface.get_size(), window_size) if dirty_rects else None
         self.clock = pg_time.Clock()
+        self.profiler = profiler  # FrameProfiler timing each phase of run(), or None
+        self.recorder = None  # replay.Recorder saving every step's input, or None
         self.entity_pool = []
-        self.event_listeners = []
+        self.running = False
+
+    def quit(self):
+        self.running = False
+
+    def dispatch_events(self):
+        """Pump the event queue; the events reach on_event() at the next step."""
+        self.input.pump()
+        if self.input.quit_requested:
+            self.input.quit_requested = False
+            self.quit()
+
+    def step(self):
+        """Run one update() on the input snapshot gathered since the previous step."""
+        snapshot = self.input.consume()
+        if self.recorder is not None:
+            self.recorder.record(snapshot)
+        if self.profiler is not None and self.input.latency is not None:
+            self.profiler.add('input latency', self.input.latency)
+
+        for event in snapshot.events:
+            if event.type == KEYDOWN and self.profiler is not None and event.key in self.profiler_keys:
+                self.on_profiler_key(event.key)
+            else:
+                self.on_event(event)
+        self.update()
+
+    def on_event(self, event):
+        pass
+
+    def on_profiler_key(self, key):
+        show, dump = self.profiler_keys
+        if key == show:
+            self.profiler.visible = not self.profiler.visible
+            if self.dirty is not None:
+                self.dirty.mark_all()
+        elif key == dump:
+            print(f"Frame profile written to {self.profiler.dump(self.profile_path)}")
 
-    def add_listener(self, i):
-        self.event_listeners.append(i)
+    def present(self):
+        """Scale the draw surface up to the window and show it."""
+        profiler = self.profiler
+        if self.dirty is not None:
+            updated = self.dirty.blit(self.surface, self.screen)
+        else:
+            self.screen.blit(pg_transform.scale(self.surface, self.window_size), (0, 0))
+            updated = None
+        if profiler is not None:
+            profiler.mark('scale')
+
+        if updated is None:
+            pg_display.update()
+        elif updated:
+            pg_display.update(updated)
+        if profiler is not None:
+            profiler.mark('flip')
+
+    def summary(self):
+        """State a replay of a recording must end in to count as the same run."""
+        return {}
+
+    def shutdown(self):
+        """Stop whatever init() started in the background; called once the game stops running."""
+
+    def finish_recording(self):
+        if self.recorder is not None:
+            print(f"Input recorded to {self.recorder.finish(self.summary())}")
+            self.recorder = None
+
+    def save_state(self):
+        """Remember entity positions so draw() can interpolate from them."""
+        for entity in self.level.entities:
+            entity.save_state()
 
     def run(self):
         self.init()
+        self.running = True
+
+        step = self.step_time
+        accumulator = 0.0
+        previous = time.perf_counter()
+
+        profiler = self.profiler
+        while self.running:
+            if profiler is not None:
+                profiler.start_frame()
+
+            self.dispatch_events()
+            if not self.running:
+                break
+            if profiler is not None:
+                profiler.mark('events')
+
+            now = time.perf_counter()
+            accumulator += now - previous
+            previous = now
 
-        while True:
-            for event in pg_event.get():
-                if event.type == QUIT:
-                    pg.quit()
-                    sys.exit()
+            steps = 0
+            while accumulator >= step and self.running:
+                if steps == self.max_catch_up_steps:
+                    # Too far behind to catch up, so slow down instead of spiralling
+                    accumulator = 0.0
+                    break
 
-                for i in self.event_listeners:
-                    self.level.entities[i].on_event(event)
+                self.save_state()
+                self.step()
+                accumulator -= step
+                steps += 1
 
+            if not self.running:
+                break
+            if profiler is not None:
+                profiler.mark('update')
+
+            self.alpha = accumulator / step
             self.draw()
-            self.update()
-            
-            
+            if profiler is not None:
+                if profiler.visible:
+                    graph = profiler.draw(self.surface)
+                    if self.dirty is not None:
+                        self.dirty.mark(graph)
+                profiler.mark('draw')
+            self.present()
 
-            pg_display.update()
-            self.clock.tick(self.fps)
-            
-            for event in pg.event.get():
-                self.on_event(event)
+            self.clock.tick(self.render_fps)
+            # Buffered debug output goes out once a frame
+            debug.flush()
+            if profiler is not None:
+                profiler.mark('idle')
+                profiler.end_frame()
+
+        debug.flush()
+        self.finish_recording()
+        if profiler is not None:
+            print(f"Frame profile written to {profiler.dump(self.profile_path)}")
+            print(self.input.latency_report())
+        self.shutdown()
+        pg.quit()
+        sys.exit()
+
+    def first_frame(self):
+        """Init and produce one presented frame, timing each startup phase."""
+        self.init()
+        self.startup.mark('init')
+        self.running = True
+
+        self.dispatch_events()
+        self.save_state()
+        self.step()
+        self.startup.mark('first update')
+
+        self.draw()
+        self.startup.mark('first draw')
+
+        self.present()
+        self.startup.mark('first present')
+        return self.startup
+
+    def simulate(self, frames=None, until=None):
+        """Step update() uncapped without drawing, for frames steps or until until(self) is true.
+
+        Returns (frames stepped, seconds elapsed, simulated frames per second).
+        """
+        self.init()
+        self.running = True
+
+        n = 0
+        start = time.perf_counter()
+        while self.running and (frames is None or n < frames):
+            if until is not None and until(self):
+                break
+
+            if self.profiler is not None:
+                self.profiler.start_frame()
+
+            # Keep SDL's queue drained so it never fills up
+            self.dispatch_events()
+            if self.profiler is not None:
+                self.profiler.mark('events')
+            self.step()
+            if self.profiler is not None:
+                self.profiler.mark('update')
+                self.profiler.end_frame()
+            debug.flush()
+            n += 1
+
+        elapsed = time.perf_counter() - start
+        self.running = False
+        self.finish_recording()
+        self.shutdown()
+        return n, elapsed, n / elapsed if elapsed > 0 else float('inf')
+
+    def replay(self, recording):
+        """Step through a replay.Recording uncapped without drawing, feeding each step its input.
+
+        Returns (steps, seconds elapsed, summary()) for comparing with recording.state.
+        """
+        self.input.reset()
+        self.init(recording.start_level)
+        self.running = True
+
+        events = recording.events
+        start = time.perf_counter()
+        for n in range(recording.steps):
+            if n in events:
+                self.input.feed(events[n])
+            self.step()
+            debug.flush()
+
+        elapsed = time.perf_counter() - start
+        self.running = False
+        self.shutdown()
+        return recording.steps, elapsed, self.summary()
         
     @abstractmethod
-    def init(self):
-        ...
+    def init(self, start_level=None):
+        """Set up a new session, on start_level or else the game's own first level."""
 
     @abstractmethod
     def draw(self):
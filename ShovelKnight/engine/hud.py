@@ -0,0 +1,66 @@
+from collections import OrderedDict
+
+from pygame import Rect
+
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, text, colour)."""
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, colour, antialias=True):
+        key = (font, text, colour, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = self.surfaces[key] = font.render(text, antialias, colour)
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+
+        return surface
+
+
+class Hud:
+    """Retained HUD layer that is only rebuilt when its inputs change.
+
+    compose(hud) is called with the new inputs applied and adds the surfaces
+    to show with add(). Every frame draw() just blits the retained items.
+    """
+
+    def __init__(self, compose, text_cache=None):
+        self.compose = compose
+        self.text_cache = TextCache() if text_cache is None else text_cache
+        self.inputs = None
+        self.items = []  # (surface, pos)
+        self.bounds = Rect(0, 0, 0, 0)
+
+    def text(self, font, text, colour, **position):
+        """Add cached text, placed with get_rect keywords such as center=(x, y)."""
+        surface = self.text_cache.render(font, text, colour)
+        self.add(surface, surface.get_rect(**position).topleft)
+
+    def add(self, surface, pos):
+        rect = surface.get_rect(topleft=pos)
+        self.items.append((surface, rect.topleft))
+        self.bounds = rect if not self.bounds else self.bounds.union(rect)
+
+    def update(self, inputs):
+        if inputs == self.inputs:
+            return
+
+        self.inputs = inputs
+        self.items = []
+        self.bounds = Rect(0, 0, 0, 0)
+        self.compose(self)
+
+    def draw(self, surface):
+        for item, pos in self.items:
+            surface.blit(item, pos)
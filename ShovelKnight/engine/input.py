@@ -0,0 +1,123 @@
+import time
+from collections import deque
+
+import pygame.event as pg_event
+from pygame.locals import QUIT, KEYDOWN, KEYUP
+
+EMPTY = frozenset()
+
+
+class InputSnapshot:
+    """Immutable key state for one simulation step.
+
+    snapshot[key] is true while key is held, like pg.key.get_pressed();
+    pressed and released hold the keys that went down or up since the
+    previous step, and events the events that did it, in order.
+    """
+    __slots__ = ('held', 'pressed', 'released', 'events')
+
+    def __init__(self, held=EMPTY, pressed=EMPTY, released=EMPTY, events=()):
+        object.__setattr__(self, 'held', held)
+        object.__setattr__(self, 'pressed', pressed)
+        object.__setattr__(self, 'released', released)
+        object.__setattr__(self, 'events', events)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('InputSnapshot is immutable')
+
+    def __getitem__(self, key):
+        return key in self.held
+
+    def __repr__(self):
+        return f"<InputSnapshot held={sorted(self.held)} pressed={sorted(self.pressed)} released={sorted(self.released)}>"
+
+
+class Input:
+    """Pumps the event queue once per frame and publishes one snapshot per step.
+
+    pump() drains only the event types the game uses (see allow()) and keeps
+    what it saw pending; consume() turns everything pending into the
+    snapshot the next update() reads. Key state follows the events rather
+    than SDL's keyboard state, so it always agrees with them. The time from
+    the pump that saw a key edge to the step that consumed it is recorded
+    as input latency.
+    """
+
+    event_types = (QUIT, KEYDOWN, KEYUP)
+
+    def __init__(self, latency_samples=300):
+        self.held = set()
+        self.pending_events = []
+        self.pending_since = None  # perf_counter() of the first pump with unconsumed events
+        self.quit_requested = False
+        self.snapshot = InputSnapshot()
+        self.latency = None  # of the last consume(), if it had key edges
+        self.latencies = deque(maxlen=latency_samples)
+
+    def allow(self):
+        """Only queue the event types in event_types; SDL drops the rest on arrival."""
+        pg_event.set_blocked(None)
+        pg_event.set_allowed(list(self.event_types))
+
+    def pump(self):
+        events = pg_event.get()
+        if not events:
+            return
+
+        if self.pending_since is None:
+            self.pending_since = time.perf_counter()
+        for event in events:
+            if event.type == QUIT:
+                self.quit_requested = True
+        self.pending_events.extend(events)
+
+    def feed(self, events):
+        """Queue events as if pump() had seen them, e.g. when replaying input."""
+        if events and self.pending_since is None:
+            self.pending_since = time.perf_counter()
+        self.pending_events.extend(events)
+
+    def consume(self):
+        """Publish the snapshot for the step about to run and return it."""
+        events = self.pending_events
+        self.latency = None
+        if not events:
+            if self.snapshot.events:
+                self.snapshot = InputSnapshot(self.snapshot.held)
+            return self.snapshot
+
+        pressed = set()
+        released = set()
+        held = self.held
+        for event in events:
+            if event.type == KEYDOWN:
+                held.add(event.key)
+                pressed.add(event.key)
+            elif event.type == KEYUP:
+                held.discard(event.key)
+                released.add(event.key)
+
+        self.snapshot = InputSnapshot(frozenset(held), frozenset(pressed), frozenset(released), tuple(events))
+        self.pending_events = []
+        if pressed or released:
+            self.latency = time.perf_counter() - self.pending_since
+            self.latencies.append(self.latency)
+        self.pending_since = None
+        return self.snapshot
+
+    def reset(self):
+        self.held.clear()
+        self.pending_events = []
+        self.pending_since = None
+        self.snapshot = InputSnapshot()
+
+    def latency_report(self):
+        if not self.latencies:
+            return "Input latency: no key events"
+        values = sorted(self.latencies)
+        mean = sum(values) / len(values)
+        return (f"Input latency over {len(values)} steps: {mean * 1000:.2f} ms mean, "
+                f"{values[-1] * 1000:.2f} ms max")
+
+
+inputs = Input()
@@ -1,8 +1,17 @@
-from engine import pg, Surface, SpriteSheet, Rect
+from engine import pg, SpriteSheet, Rect
+from engine.assets import assets
 import os
+import re
 
 from player import Knight
-from enemy import Beeto
+from enemy import Beeto, BeetoBatch
+
+from .activation import Activation
+from .broadphase import SweepAndPrune
+from .chunks import ChunkedMap
+from .level_format import load_level
+from .spatial import TileStore, WIN_TRIGGER, merge_cells
+from .triggers import TriggerVolumes
 
 # Get the directory containing this file
 base_path = os.path.dirname(__file__)
@@ -11,20 +20,6 @@ base_path = os.path.dirname(__file__)
 plains_path = os.path.join(base_path, '../assets/images/plains.png')
 door_path = os.path.join(base_path, '../assets/images/DOOR.png')
 
-# Try to load door image with error handling
-try:
-    door_image_raw = pg.image.load(door_path)
-    print(f"Original door size: {door_image_raw.get_size()}")
-except pg.error:
-    door_path = os.path.join(base_path, '../DOOR.png')
-    try:
-        door_image_raw = pg.image.load(door_path)
-        print(f"Original door size: {door_image_raw.get_size()}")
-    except pg.error:
-        print(f"Warning: Could not load door image from {door_path}")
-        door_image_raw = pg.Surface((16, 32))
-        door_image_raw.fill((139, 69, 19))
-
 sprites = SpriteSheet(plains_path, {
     'bg': (0, 20, 150, 90),
     'g0': (144, 224, 16, 16),
@@ -38,129 +33,186 @@ sprites = SpriteSheet(plains_path, {
     'sp': (352, 240, 16, 16),
 })
 
-# Create a proper 16x32 door sprite (1 tile wide, 2 tiles tall)
-door_sprite = pg.transform.smoothscale(door_image_raw, (16, 32))
-print(f"Door sprite scaled to: {door_sprite.get_size()}")
+
+def load_door_sprite():
+    # Try to load door image with error handling
+    door_image_raw = None
+    for path in (door_path, os.path.join(base_path, '../DOOR.png')):
+        try:
+            door_image_raw = assets.image(path)
+            break
+        except (pg.error, FileNotFoundError):
+            pass
+
+    if door_image_raw is None:
+        print(f"Warning: Could not load door image from {door_path}")
+        door_image_raw = pg.Surface((16, 32))
+        door_image_raw.fill((139, 69, 19))
+
+    # Create a proper 16x32 door sprite (1 tile wide, 2 tiles tall)
+    return pg.transform.smoothscale(door_image_raw, (16, 32))
+
+
+# Level cells that become map tiles, i.e. everything but empty space and spawns
+TILE_CELLS = re.compile(rb'[^ PB]')
 
 sprite_mapping = {
-    '[': sprites.sprite('g0'),
-    '=': sprites.sprite('g1'),
-    ']': sprites.sprite('g2'),
-    '|': sprites.sprite('g3'),
-    '.': sprites.sprite('g6'),
-    'M': sprites.sprite('sp'),
-    'H': sprites.sprite('ld'),
-    'W': door_sprite,
+    '[': 'g0',
+    '=': 'g1',
+    ']': 'g2',
+    '|': 'g3',
+    '.': 'g6',
+    'M': 'sp',
+    'H': 'ld',
 }
 
 
-class Tile:
-    def __init__(self, rect, type):
-        self.rect = rect
-        self.type = type
+def tile_sprite(k):
+    if k == 'W':
+        return assets.memo('door', load_door_sprite)
+    return sprites.sprite(sprite_mapping[k])
+
+
+class LevelLayout:
+    """Everything about a level that doesn't touch pygame surfaces, sounds or asset caches.
+
+    This is the part of building a level that is safe to do on a worker
+    thread: the compiled grid, collision tiles, trigger volumes, where each
+    map tile goes and the entity spawns. Level turns it into the playable
+    level on the main thread.
+    """
+
+    # Solid cells this many (columns, rows) around a ladder are never merged.
+    # The knight's hitbox widens when it steps off a ladder, which can leave it
+    # inside the floor, and pushing it out of a merged rect lands it somewhere
+    # else than pushing it out of the neighbouring cell.
+    ladder_margin = (3, 2)
+
+    def __init__(self, data, merge_tiles=False):
+        # Merge solid cells into larger collision rects instead of one rect per cell
+        self.merge_tiles = merge_tiles
+        self.tiles = TileStore()
+        self.triggers = TriggerVolumes()  # spikes and doors
+        self.placements = []  # (level character, (x, y)) of every map tile
+
+        # Memory-mapped compiled form of the level, rebuilt when the .txt is newer
+        self.data = load_level(data)
+        self.w = self.data.w
+        self.h = self.data.h
+
+        self.build_tiles()
+
+    def build_tiles(self):
+        solid_cells = []
+        ladder_cells = []
+
+        for i in range(self.h):
+            row = self.data.row(i)
+            # Only visit the cells that hold a tile; spawns come from the spawn table
+            for match in TILE_CELLS.finditer(row):
+                j = match.start()
+                k = chr(row[j])
+
+                # Handle door specially - it's 2 tiles tall
+                if k == 'W':
+                    # Draw the door starting from current position, extending upward
+                    # The door bottom should align with the tile where 'W' is placed
+                    door_x = j * 16
+                    door_y = i * 16 - 16  # Move up by 16 pixels so door spans this tile and the one above
+                    
+                    # Make sure we don't draw above the map bounds
+                    if door_y >= 0:
+                        self.placements.append((k, (door_x, door_y)))
+                    else:
+                        # If we can't fit the full door, just draw it starting from the current position
+                        self.placements.append((k, (door_x, i * 16)))
+                else:
+                    self.placements.append((k, (j*16, i*16)))
+
+                if k == 'H':
+                    ladder_cells.append((j, i))
+                    self.tiles.add(Rect(j*16, i*16, 16, 16), 'ladder')
+                elif k == 'M':
+                    self.triggers.add(Rect(j*16, i*16, 16, 16), 'spike')
+                elif k == 'W':
+                    # Create win trigger for both tiles that the door occupies
+                    self.triggers.add(Rect(j*16, i*16, 16, 16), 'win_trigger')
+                    # DON'T add door tiles to self.tiles - they shouldn't show collision debug
+                    
+                    # Also create trigger for the tile above (if it exists)
+                    if i > 0:
+                        self.triggers.add(Rect(j*16, (i-1)*16, 16, 16), 'win_trigger')
+                        # DON'T add this to self.tiles either
+                elif self.merge_tiles:
+                    solid_cells.append((j, i))
+                else:
+                    self.tiles.add(Rect(j*16, i*16, 16, 16), 'block')
+
+        if solid_cells:
+            dx, dy = self.ladder_margin
+            near_ladders = {(j + x, i + y) for j, i in ladder_cells
+                            for x in range(-dx, dx + 1) for y in range(-dy, dy + 1)}
+            for rect in merge_cells(solid_cells, keep=near_ladders.intersection(solid_cells)):
+                self.tiles.add(rect, 'block')
 
 
 class Level:
-    def __init__(self, data):
-        self.tiles = []
+    def __init__(self, data, merge_tiles=False, active_margin=128, layout=None):
+        # layout may come ready-made from a worker thread; see LevelLayout
+        if layout is None:
+            layout = LevelLayout(data, merge_tiles)
+        self.merge_tiles = layout.merge_tiles
+        self.tiles = layout.tiles
+        self.triggers = layout.triggers
         self.entities = []
-        self.win_triggers = []
-        self.spikes = []
+        self.broadphase = SweepAndPrune()  # entity-versus-entity pairs
+        self.kills = 0  # entities despawned because they died
         
         try:
             self.level_number = int(data.split('level_')[1].split('.')[0])
         except:
             self.level_number = 1
         
-        with open(data) as file:
-            # Read all lines and normalize them
-            raw_lines = file.read().split('\n')
-            
-            # Remove trailing empty lines
-            while raw_lines and not raw_lines[-1].strip():
-                raw_lines.pop()
-            
-            # If no lines remain, create a minimal level
-            if not raw_lines:
-                raw_lines = ['P W']
-            
-            # Find the maximum width across all lines
-            max_width = max(len(line) for line in raw_lines) if raw_lines else 1
-            
-            # Pad all lines to the same width with spaces
-            self.array = []
-            for line in raw_lines:
-                padded_line = line.ljust(max_width)  # Pad with spaces to max_width
-                self.array.append(padded_line)
-            
-            self.w = max_width
-            self.h = len(self.array)
+        self.data = layout.data
+        self.w = self.data.w
+        self.h = self.data.h
             
         print(f"Level dimensions: {self.w}x{self.h}")
-        self.map = Surface((self.w*16, self.h*16), pg.SRCALPHA)
-
-        self.build_map()
-
-    def build_map(self):
-        for i in range(self.h):
-            for j in range(self.w):
-                # Safe character access - default to space if index is out of bounds
-                if j < len(self.array[i]):
-                    k = self.array[i][j]
-                else:
-                    k = ' '
-
-                if k != ' ':
-                    if k not in ('P', 'B'):
-                        # Handle door specially - it's 2 tiles tall
-                        if k == 'W':
-                            # Draw the door starting from current position, extending upward
-                            # The door bottom should align with the tile where 'W' is placed
-                            door_x = j * 16
-                            door_y = i * 16 - 16  # Move up by 16 pixels so door spans this tile and the one above
-                            
-                            # Make sure we don't draw above the map bounds
-                            if door_y >= 0:
-                                self.map.blit(sprite_mapping[k], (door_x, door_y))
-                            else:
-                                # If we can't fit the full door, just draw it starting from the current position
-                                self.map.blit(sprite_mapping[k], (door_x, i * 16))
-                        else:
-                            self.map.blit(sprite_mapping[k], (j*16, i*16))
-
-                        if k == 'H':
-                            _type = 'ladder'
-                            self.tiles.append(Tile(Rect(j*16, i*16, 16, 16), _type))
-                        elif k == 'M':
-                            _type = 'spike'
-                            spike_tile = Tile(Rect(j*16, i*16, 16, 16), _type)
-                            self.spikes.append(spike_tile)
-                        elif k == 'W':
-                            _type = 'win_trigger'
-                            # Create win trigger for both tiles that the door occupies
-                            win_tile_bottom = Tile(Rect(j*16, i*16, 16, 16), _type)
-                            self.win_triggers.append(win_tile_bottom)
-                            # DON'T add door tiles to self.tiles - they shouldn't show collision debug
-                            
-                            # Also create trigger for the tile above (if it exists)
-                            if i > 0:
-                                win_tile_top = Tile(Rect(j*16, (i-1)*16, 16, 16), _type)
-                                self.win_triggers.append(win_tile_top)
-                                # DON'T add this to self.tiles either
-                        else:
-                            _type = 'block'
-                            self.tiles.append(Tile(Rect(j*16, i*16, 16, 16), _type))
-                    elif k == 'P':
-                        self.entities.append(Knight(Rect(j*16, i*16-15, 34, 31)))
-                    elif k == 'B':
-                        self.entities.append(Beeto(Rect(j*16, i*16+1, 26, 15)))
+        self.map = ChunkedMap(self.w*16, self.h*16)
+
+        self.build_map(layout)
+
+        # Move all Beetos together when NumPy is available and there are enough of them
+        beetos = [entity for entity in self.entities if isinstance(entity, Beeto)]
+        if BeetoBatch.supported and len(beetos) >= BeetoBatch.min_size:
+            self.enemy_batch = BeetoBatch(beetos, self.tiles, (self.w, self.h))
+        else:
+            self.enemy_batch = None
+
+        # Only entities near the camera are simulated
+        self.activation = Activation(self.entities, margin=active_margin)
+
+    def build_map(self, layout):
+        for k, pos in layout.placements:
+            self.map.blit(tile_sprite(k), pos)
+
+        for k, j, i in self.data.spawns:
+            if k == 'P':
+                self.entities.append(Knight(Rect(j*16, i*16-15, 34, 31)))
+            elif k == 'B':
+                self.entities.append(Beeto(Rect(j*16, i*16+1, 26, 15)))
+
+    def remove(self, entity):
+        """Despawn an entity."""
+        if entity in self.entities:
+            self.entities.remove(entity)
+            if getattr(entity, 'dead', False):
+                self.kills += 1
+        self.activation.remove(entity)
+        self.triggers.forget(entity)
 
     def check_win_condition(self, player):
         if not player:
             return False
             
-        for trigger in self.win_triggers:
-            if player.rect.colliderect(trigger.rect):
-                return True
-                
-        return False
\ No newline at end of file
+        return self.triggers.inside(player, WIN_TRIGGER)
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""Compiled binary levels.
+
+A compiled level is a fixed header, then one byte per cell (the level text's
+character, rows padded with spaces), then a table of entity spawns:
+
+    header  '<4sHHIII'  magic, version, reserved, width, height, spawn count
+    grid    width * height bytes, row-major
+    spawns  '<cxxxII' per spawn: kind (b'P' or b'B'), column, row
+
+It is built from the .txt source next to it and rebuilt whenever the source
+is newer, then read through mmap so loading costs about as much as mapping
+the file.
+"""
+import mmap
+import os
+import struct
+import sys
+import threading
+
+MAGIC = b'SKLV'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIII')
+SPAWN = struct.Struct('<cxxxII')
+SPAWN_KINDS = b'PB'
+EXTENSION = '.lvl'
+
+
+def parse_text(text):
+    """Return (width, height, grid bytes, spawns) for level source text."""
+    # Read all lines and normalize them
+    raw_lines = text.split('\n')
+
+    # Remove trailing empty lines
+    while raw_lines and not raw_lines[-1].strip():
+        raw_lines.pop()
+
+    # If no lines remain, create a minimal level
+    if not raw_lines:
+        raw_lines = ['P W']
+
+    # Pad all lines to the same width with spaces
+    width = max(len(line) for line in raw_lines)
+    grid = b''.join(line.ljust(width).encode('ascii') for line in raw_lines)
+    height = len(raw_lines)
+
+    spawns = []
+    for i in range(height):
+        row = grid[i*width:(i+1)*width]
+        for j, k in enumerate(row):
+            if k in SPAWN_KINDS:
+                spawns.append((bytes((k,)), j, i))
+
+    return width, height, grid, spawns
+
+
+def pack(width, height, grid, spawns):
+    return b''.join([HEADER.pack(MAGIC, VERSION, 0, width, height, len(spawns)), grid]
+                    + [SPAWN.pack(kind, j, i) for kind, j, i in spawns])
+
+
+def compile_level(source, target=None):
+    """Write the compiled form of source and return its path."""
+    if target is None:
+        target = os.path.splitext(source)[0] + EXTENSION
+
+    with open(source) as file:
+        data = pack(*parse_text(file.read()))
+
+    # Write next to the target and rename, so a reader never maps half a file.
+    # The prefetch worker may compile the same level as the main thread, so
+    # the temporary name is per thread and not just per process
+    tmp = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'wb') as file:
+        file.write(data)
+    os.replace(tmp, target)
+
+    return target
+
+
+class CompiledLevel:
+    """Read-only view of a compiled level; grid is a zero-copy memoryview."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        magic, version, _, self.w, self.h, count = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not a compiled level of this version')
+
+        start = HEADER.size
+        end = start + self.w*self.h
+        self.grid = memoryview(buffer)[start:end]
+        self.spawns = [(kind.decode('ascii'), j, i)
+                       for kind, j, i in SPAWN.iter_unpack(buffer[end:end + count*SPAWN.size])]
+
+    def row(self, i):
+        return self.grid[i*self.w:(i+1)*self.w]
+
+
+def is_stale(source, target):
+    try:
+        return os.path.getmtime(target) < os.path.getmtime(source)
+    except OSError:
+        return True
+
+
+def map_file(path):
+    with open(path, 'rb') as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def load_level(source):
+    """Map the compiled form of source, (re)building it when missing or out of date."""
+    target = os.path.splitext(source)[0] + EXTENSION
+
+    try:
+        if is_stale(source, target):
+            compile_level(source, target)
+        try:
+            return CompiledLevel(map_file(target))
+        except ValueError:
+            # Written by another version of the format
+            compile_level(source, target)
+            return CompiledLevel(map_file(target))
+    except OSError:
+        # Read-only install: compile into memory instead
+        with open(source) as file:
+            return CompiledLevel(pack(*parse_text(file.read())))
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        print(compile_level(path))
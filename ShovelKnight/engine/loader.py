@@ -0,0 +1,68 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LevelLoader:
+    """Builds levels, parsing the next one on a worker thread while this one is played.
+
+    parse(path) does the part of building a level that touches no pygame
+    state or shared asset cache, and build(path, parsed) makes the level
+    from it; build(path, None) does both. prefetch(path) starts parsing in
+    the background; load(path) builds from that parse, waiting for it if
+    the worker has started on it, and otherwise builds from scratch.
+    Building always happens on the calling thread. Every load is recorded
+    in timings as (path, 'prefetch' or 'sync', seconds the caller waited,
+    seconds building including parsing).
+    """
+
+    def __init__(self, build, parse):
+        self.build = build
+        self.parse = parse
+        self.executor = None  # started on the first prefetch
+        self.pending = {}  # path -> Future of (parsed, seconds parsing)
+        self.timings = []
+
+    def timed_parse(self, path):
+        start = time.perf_counter()
+        parsed = self.parse(path)
+        return parsed, time.perf_counter() - start
+
+    def prefetch(self, path):
+        if path in self.pending:
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='level-prefetch')
+        self.pending[path] = self.executor.submit(self.timed_parse, path)
+
+    def load(self, path):
+        start = time.perf_counter()
+        future = self.pending.pop(path, None)
+
+        # A parse still queued behind another is dropped, but one the worker
+        # is already running can't be cancelled; wait for it rather than
+        # parsing the same file twice at once
+        if future is not None and (future.done() or not future.cancel()) \
+                and future.exception() is None:
+            parsed, parsing = future.result()
+            how = 'prefetch'
+        else:
+            parsed, parsing = None, 0.0
+            how = 'sync'
+        level = self.build(path, parsed)
+        built = parsing + time.perf_counter() - start
+
+        waited = time.perf_counter() - start
+        self.timings.append((path, how, waited, built))
+        return level
+
+    def report(self):
+        path, how, waited, built = self.timings[-1]
+        return f"Loaded {path} ({how}): waited {waited * 1000:.1f} ms, built in {built * 1000:.1f} ms"
+
+    def shutdown(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
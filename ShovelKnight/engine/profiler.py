@@ -0,0 +1,171 @@
+import csv
+import json
+import time
+from array import array
+
+import pygame.draw as pg_draw
+from pygame.surface import Surface
+
+PHASES = ('events', 'update', 'draw', 'scale', 'flip', 'idle')
+
+COLOURS = {
+    'events': (80, 160, 255),
+    'update': (90, 220, 90),
+    'draw': (255, 200, 60),
+    'scale': (255, 120, 40),
+    'flip': (220, 70, 200),
+    'idle': (70, 70, 70),
+}
+
+
+class FrameProfiler:
+    """Where each of the last size frames spent its time, kept in a ring buffer.
+
+    The game loop calls start_frame(), then mark(phase) after each phase and
+    end_frame(). As with PhaseTimer, mark() charges the time since the last
+    mark to the named phase, so a phase that runs several times in a frame
+    adds up. add(name, seconds) records a detail column, such as one entity
+    type's updates or a level load. Details are already inside a phase, so
+    they are left out of the frame total.
+    """
+
+    graph_size = (120, 60)
+    graph_ms = 33.3  # frame time at the top of the graph
+
+    def __init__(self, size=300, phases=PHASES):
+        self.size = size
+        self.phases = phases
+        self.details = []  # detail column names, in order of first use
+        self.columns = {name: array('d', bytes(8 * size)) for name in phases}
+        self.current = dict.fromkeys(phases, 0.0)
+        self.head = 0  # slot the next frame goes into
+        self.count = 0  # frames in the buffer
+        self.frames = 0  # frames ever recorded
+        self.last = time.perf_counter()
+
+        self.visible = False
+        self.graph = None
+        self.graph_frames = 0  # self.frames when the graph was last brought up to date
+
+    def start_frame(self):
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def add(self, name, seconds):
+        if name not in self.columns:
+            self.details.append(name)
+            self.columns[name] = array('d', bytes(8 * self.size))
+            self.current[name] = 0.0
+        self.current[name] += seconds
+
+    def timed(self, name, fn, *args):
+        """Call fn(*args) and add the time it took to the detail column name."""
+        start = time.perf_counter()
+        result = fn(*args)
+        self.add(name, time.perf_counter() - start)
+        return result
+
+    def end_frame(self):
+        head = self.head
+        current = self.current
+        for name, column in self.columns.items():
+            column[head] = current[name]
+            current[name] = 0.0
+
+        self.head = (head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+        self.frames += 1
+
+    def slots(self):
+        """Buffer slots from the oldest frame to the newest."""
+        start = self.head - self.count
+        return [(start + i) % self.size for i in range(self.count)]
+
+    def total(self, slot):
+        return sum(self.columns[phase][slot] for phase in self.phases)
+
+    def names(self):
+        return list(self.phases) + self.details
+
+    def rows(self):
+        """One dict of milliseconds per buffered frame, oldest first."""
+        first = self.frames - self.count
+        rows = []
+        for i, slot in enumerate(self.slots()):
+            row = {'frame': first + i}
+            row.update((name, self.columns[name][slot] * 1000) for name in self.names())
+            row['total'] = self.total(slot) * 1000
+            rows.append(row)
+        return rows
+
+    def dump(self, path):
+        """Write the buffer to path, as JSON for a .json path and CSV otherwise."""
+        rows = self.rows()
+        with open(path, 'w', newline='') as file:
+            if path.endswith('.json'):
+                json.dump({'unit': 'ms', 'phases': list(self.phases), 'details': self.details,
+                           'frames': rows}, file, indent=1)
+            else:
+                writer = csv.DictWriter(file, ['frame'] + self.names() + ['total'])
+                writer.writeheader()
+                writer.writerows(rows)
+        return path
+
+    def report(self):
+        lines = []
+        for name in self.names() + ['total']:
+            if name == 'total':
+                values = sorted(self.total(slot) for slot in self.slots())
+            else:
+                values = sorted(self.columns[name][slot] for slot in self.slots())
+            if not values:
+                continue
+            mean = sum(values) / len(values)
+            p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+            lines.append(f"{name:<20}{mean * 1000:9.3f} ms mean{p99 * 1000:9.3f} ms p99{values[-1] * 1000:9.3f} ms max")
+        return '\n'.join(lines)
+
+    def draw_column(self, x, slot):
+        graph = self.graph
+        width, height = self.graph_size
+        scale = height / self.graph_ms
+
+        pg_draw.line(graph, (0, 0, 0), (x, 0), (x, height - 1))
+        bottom = float(height)
+        for phase in self.phases:
+            top = bottom - self.columns[phase][slot] * 1000 * scale
+            if int(top) < int(bottom):
+                pg_draw.line(graph, COLOURS.get(phase, (255, 255, 255)),
+                             (x, max(int(top), 0)), (x, int(bottom) - 1))
+            bottom = top
+            if bottom <= 0:
+                break
+
+        # Line at a 60 fps frame budget
+        graph.set_at((x, int(height - 1000 / 60 * scale)), (255, 255, 255))
+
+    def draw(self, surface):
+        """Blit the frame-time graph at the top right of surface; returns its rect."""
+        width, height = self.graph_size
+        if self.graph is None:
+            self.graph = Surface(self.graph_size)
+            self.graph_frames = 0
+
+        # Scroll the graph and only draw the frames recorded since last time
+        new = min(self.frames - self.graph_frames, self.count)
+        if new >= width or self.graph_frames == 0:
+            self.graph.fill((0, 0, 0))
+            new = min(self.count, width)
+        else:
+            self.graph.scroll(-new, 0)
+
+        slots = self.slots()
+        for i in range(new):
+            self.draw_column(width - new + i, slots[len(slots) - new + i])
+        self.graph_frames = self.frames
+
+        return surface.blit(self.graph, (surface.get_width() - width - 4, 4))
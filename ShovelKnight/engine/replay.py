@@ -0,0 +1,96 @@
+"""Input recordings, for replaying a session headlessly.
+
+A recording holds the key events each simulation step consumed, then the
+state the game ended in:
+
+    header   '<4sHHIII' magic, version, fps, start level, step count,
+             '<I' size of the records in bytes
+    records  '<IH' per step that had input: steps since the previous such
+             step, event count; then '<BI' per event: 0 down or 1 up, key
+    trailer  '<I' length, then that many bytes of JSON with the final state
+
+Steps without input cost nothing, so an hour of play is a few kilobytes.
+"""
+import json
+import struct
+
+from pygame.event import Event
+from pygame.locals import KEYDOWN, KEYUP
+
+MAGIC = b'SKRP'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIII')
+RECORD = struct.Struct('<IH')
+EVENT = struct.Struct('<BI')
+LENGTH = struct.Struct('<I')
+
+EVENT_TYPES = (KEYDOWN, KEYUP)
+
+
+class Recorder:
+    """Collects the input of every step; finish() writes the recording."""
+
+    def __init__(self, path, fps, start_level):
+        self.path = path
+        self.fps = fps
+        self.start_level = start_level
+        self.records = bytearray()
+        self.steps = 0
+        self.last = 0  # step of the previous record
+
+    def record(self, snapshot):
+        events = [event for event in snapshot.events if event.type in EVENT_TYPES]
+        if events:
+            self.records += RECORD.pack(self.steps - self.last, len(events))
+            for event in events:
+                self.records += EVENT.pack(EVENT_TYPES.index(event.type), event.key)
+            self.last = self.steps
+        self.steps += 1
+
+    def finish(self, state):
+        trailer = json.dumps(state).encode()
+        with open(self.path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.fps, self.start_level, self.steps,
+                                   len(self.records)))
+            file.write(self.records)
+            file.write(LENGTH.pack(len(trailer)) + trailer)
+        return self.path
+
+
+class Recording:
+    """A recording read back: fps, start_level, steps, events by step and the final state."""
+
+    def __init__(self, data):
+        magic, version, self.fps, self.start_level, self.steps, size = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not an input recording of this version')
+
+        self.events = {}  # step -> [Event]
+        offset = HEADER.size
+        step = 0
+        end = offset + size
+        while offset < end:
+            delta, count = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            step += delta
+            events = self.events[step] = []
+            for _ in range(count):
+                kind, key = EVENT.unpack_from(data, offset)
+                offset += EVENT.size
+                events.append(Event(EVENT_TYPES[kind], key=key))
+
+        length, = LENGTH.unpack_from(data, end)
+        start = end + LENGTH.size
+        self.state = json.loads(bytes(data[start:start + length]))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            return cls(file.read())
+
+
+def differences(expected, actual):
+    """Keys whose values differ between two state dicts, as (key, expected, actual)."""
+    return [(key, expected.get(key), actual.get(key))
+            for key in sorted(set(expected) | set(actual))
+            if expected.get(key) != actual.get(key)]
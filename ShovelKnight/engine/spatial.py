@@ -0,0 +1,284 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from pygame import Rect
+
+CELL_SIZE = 16
+
+# Tile type codes stored in TileStore.code
+BLOCK, LADDER, SPIKE, WIN_TRIGGER = range(4)
+TYPE_NAMES = ('block', 'ladder', 'spike', 'win_trigger')
+TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+
+class TileView:
+    """Lightweight handle on one tile of a TileStore, for code that wants tile objects."""
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def rect(self):
+        return self.store.rect(self.index)
+
+    @property
+    def code(self):
+        return self.store.code[self.index]
+
+    @property
+    def type(self):
+        return TYPE_NAMES[self.store.code[self.index]]
+
+    @property
+    def left(self):
+        return self.store.x[self.index]
+
+    @property
+    def top(self):
+        return self.store.y[self.index]
+
+    @property
+    def right(self):
+        return self.store.x[self.index] + self.store.w[self.index]
+
+    @property
+    def bottom(self):
+        return self.store.y[self.index] + self.store.h[self.index]
+
+    def __eq__(self, other):
+        return isinstance(other, TileView) and other.store is self.store and other.index == self.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    def __repr__(self):
+        return f"<TileView {self.type} {self.rect}>"
+
+
+def pack_key(high, low):
+    """One sortable int for a pair of ints, ordered by high then low (low must fit in 32 bits)."""
+    return (high << 32) + low
+
+
+class KeyIndex:
+    """Tile indices grouped by an integer key, as compressed sparse rows.
+
+    keys holds every distinct key once, sorted; the tiles under keys[k] are
+    tiles[offsets[k]:offsets[k + 1]], in the order they were added. Three
+    flat arrays, so the index costs a few bytes per entry however many
+    keys there are.
+    """
+    __slots__ = ('keys', 'offsets', 'tiles')
+
+    def __init__(self, pairs):
+        """Build from (key, tile index) pairs."""
+        self.keys = array('q')
+        self.offsets = array('i')
+        self.tiles = array('i')
+        for key, i in sorted(pairs):
+            if not self.keys or self.keys[-1] != key:
+                self.keys.append(key)
+                self.offsets.append(len(self.tiles))
+            self.tiles.append(i)
+        self.offsets.append(len(self.tiles))
+
+    def span(self, low, high):
+        """Tiles under every key from low to high inclusive, by key then insertion order."""
+        keys = self.keys
+        offsets = self.offsets
+        return self.tiles[offsets[bisect_left(keys, low)]:offsets[bisect_right(keys, high)]]
+
+
+class TileStore:
+    """Tiles kept as parallel arrays of x, y, w, h and type code, indexed by grid cell.
+
+    Iterating or indexing gives TileView objects. The query methods return the
+    tiles overlapping a rect in insertion order, so collision resolution sees
+    them in the same order as a plain list scan. Each type also has a column
+    index, keyed by the column of the tile's centre, for nearest() lookups.
+    Both indexes are KeyIndex arrays, rebuilt by the first query after an add().
+    """
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.x = array('i')
+        self.y = array('i')
+        self.w = array('i')
+        self.h = array('i')
+        self.code = array('B')
+        self._cells = None  # KeyIndex of pack_key(cy, cx) -> tiles covering that cell
+        self._columns = None  # KeyIndex of pack_key(code, centre column) -> tiles
+
+    def __len__(self):
+        return len(self.code)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('tile index out of range')
+        return TileView(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.code)):
+            yield TileView(self, i)
+
+    @property
+    def cells(self):
+        if self._cells is None:
+            self._cells = KeyIndex(self.cell_pairs())
+        return self._cells
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            size = self.cell_size
+            xs, ws = self.x, self.w
+            self._columns = KeyIndex((pack_key(code, (xs[i] + ws[i]//2) // size), i)
+                                     for i, code in enumerate(self.code))
+        return self._columns
+
+    def cell_pairs(self):
+        xs, ys, ws, hs = self.x, self.y, self.w, self.h
+        for i in range(len(self.code)):
+            x0, x1, y0, y1 = self.cell_range(xs[i], ys[i], ws[i], hs[i])
+            for cy in range(y0, y1 + 1):
+                for cx in range(x0, x1 + 1):
+                    yield pack_key(cy, cx), i
+
+    def rect(self, i):
+        return Rect(self.x[i], self.y[i], self.w[i], self.h[i])
+
+    def cell_range(self, x, y, w, h):
+        size = self.cell_size
+        # Rects are half-open, so the last covered pixel is right-1 / bottom-1
+        return (x // size, (x + w - 1) // size, y // size, (y + h - 1) // size)
+
+    def add(self, rect, type):
+        """Store a tile with a type name or code and return its index."""
+        i = len(self.code)
+        x, y, w, h = rect
+        self.x.append(x)
+        self.y.append(y)
+        self.w.append(w)
+        self.h.append(h)
+        self.code.append(TYPE_CODES[type] if isinstance(type, str) else type)
+        self._cells = self._columns = None
+        return i
+
+    def query_indices(self, rect, code=None):
+        """Indices of the tiles overlapping rect, optionally only those of one type code."""
+        left, top, width, height = rect
+        if width <= 0 or height <= 0:
+            return []
+        right = left + width
+        bottom = top + height
+
+        x0, x1, y0, y1 = self.cell_range(left, top, width, height)
+        cells = self.cells
+        xs, ys, ws, hs, codes = self.x, self.y, self.w, self.h, self.code
+        keys, offsets, tiles = cells.keys, cells.offsets, cells.tiles
+        found = set()
+        for cy in range(y0, y1 + 1):
+            # cells.span() for this row, without building the slice
+            row = cy << 32
+            for k in range(offsets[bisect_left(keys, row + x0)], offsets[bisect_right(keys, row + x1)]):
+                i = tiles[k]
+                if (xs[i] < right and xs[i] + ws[i] > left and ys[i] < bottom and ys[i] + hs[i] > top
+                        and (code is None or codes[i] == code)):
+                    found.add(i)
+
+        return sorted(found)
+
+    def overlaps(self, rects, code=None):
+        """Bulk query_indices(): one sorted index list per rect.
+
+        The cell rows of all the rects are looked up in key order, so the
+        cell index is walked once front to back for the lot instead of
+        bisected from scratch for every rect.
+        """
+        bounds = []  # (left, top, right, bottom) per rect
+        rows = []  # (first key, last key, rect number) per cell row a rect covers
+        for n, (left, top, width, height) in enumerate(rects):
+            bounds.append((left, top, left + width, top + height))
+            if width <= 0 or height <= 0:
+                continue
+            x0, x1, y0, y1 = self.cell_range(left, top, width, height)
+            for cy in range(y0, y1 + 1):
+                rows.append(((cy << 32) + x0, (cy << 32) + x1, n))
+        rows.sort()
+
+        cells = self.cells
+        xs, ys, ws, hs, codes = self.x, self.y, self.w, self.h, self.code
+        keys, offsets, tiles = cells.keys, cells.offsets, cells.tiles
+        found = [set() for _ in bounds]
+        k = 0
+        for low, high, n in rows:
+            # Rows come sorted by first key, so the search never has to go back
+            k = bisect_left(keys, low, k)
+            end = bisect_right(keys, high, k)
+            left, top, right, bottom = bounds[n]
+            hits = found[n]
+            for t in range(offsets[k], offsets[end]):
+                i = tiles[t]
+                if (xs[i] < right and xs[i] + ws[i] > left and ys[i] < bottom and ys[i] + hs[i] > top
+                        and (code is None or codes[i] == code)):
+                    hits.add(i)
+
+        return [sorted(hits) for hits in found]
+
+    def query(self, rect, code=None):
+        return [TileView(self, i) for i in self.query_indices(rect, code)]
+
+    def nearest(self, code, x, top, bottom, max_distance):
+        """Tile of one type whose centre is closest to x, at most max_distance away,
+        that spans some of top..bottom (edges included). Ties go to the first added.
+        """
+        first = (x - max_distance) // self.cell_size
+        last = (x + max_distance) // self.cell_size
+
+        xs, ys, ws, hs = self.x, self.y, self.w, self.h
+        best = None
+        for i in self.columns.span(pack_key(code, first), pack_key(code, last)):
+            distance = abs(xs[i] + ws[i]//2 - x)
+            if distance <= max_distance and ys[i] <= bottom and ys[i] + hs[i] >= top:
+                if best is None or (distance, i) < best:
+                    best = (distance, i)
+
+        return None if best is None else TileView(self, best[1])
+
+
+def merge_cells(cells, cell_size=CELL_SIZE, keep=frozenset()):
+    """Greedily merge a set of (col, row) cells into maximal rectangles.
+
+    Each rectangle grows right as far as the row allows, then down while the
+    whole span is free, so long floors and walls become a single rect.
+    Cells in keep stay rects of their own and never join a merged one.
+    """
+    left = set(cells) - keep
+    rects = []
+
+    for col, row in sorted(cells, key=lambda cell: (cell[1], cell[0])):
+        if (col, row) in keep:
+            rects.append(Rect(col * cell_size, row * cell_size, cell_size, cell_size))
+            continue
+        if (col, row) not in left:
+            continue
+
+        width = 1
+        while (col + width, row) in left:
+            width += 1
+
+        height = 1
+        while all((c, row + height) in left for c in range(col, col + width)):
+            height += 1
+
+        for r in range(row, row + height):
+            for c in range(col, col + width):
+                left.discard((c, r))
+
+        rects.append(Rect(col * cell_size, row * cell_size, width * cell_size, height * cell_size))
+
+    return rects
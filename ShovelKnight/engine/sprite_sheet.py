@@ -1,38 +1,84 @@
-import pygame.image as pg_image
 import pygame.transform as pg_transform
-from engine import *
-from engine.entity import Entity
+
+from .assets import assets
+
 
 class SpriteSheet:
     def __init__(self, image_path, sprites):
-        self.image = pg_image.load(image_path)
+        self.image_path = image_path
+        self._image = None  # loaded on first use
         self.sprites = sprites
+        self.cache = {}  # (sprite id, size) -> Surface
+        self.frames = {}  # (sprite id, size) -> [Surface]
+        self.variants = {}  # (sprite id or frame surface, flip, alpha) -> Surface
 
-    def sprite(self, tile_id, size=None):
-        image = self.image.subsurface(self.sprites[tile_id])
+        assets.add_sheet(self)
+
+    @property
+    def image(self):
+        if self._image is None:
+            self._image = assets.image(self.image_path)
+        return self._image
+
+    def load(self, rect, size=None):
+        image = self.image.subsurface(rect)
         if size is not None:
             image = pg_transform.scale(image, size)
 
         return image
 
+    def sprite(self, tile_id, size=None):
+        key = (tile_id, size)
+        image = self.cache.get(key)
+        if image is None:
+            assets.miss('sprite')
+            image = self.cache[key] = self.load(self.sprites[tile_id], size)
+        else:
+            assets.hit('sprite')
+
+        return image
+
     def animation_sprites(self, tile_id, size=None):
-        images = []
-        for rect in self.sprites[tile_id]:
-            image = self.image.subsurface(rect)
-            if size is not None:
-                image = pg_transform.scale(image, size)
+        key = (tile_id, size)
+        images = self.frames.get(key)
+        if images is None:
+            assets.miss('frames')
+            images = self.frames[key] = [self.load(rect, size) for rect in self.sprites[tile_id]]
+        else:
+            assets.hit('frames')
 
-            images.append(image)
         return images
 
-# Beeto (enemy) class
-sprites = SpriteSheet('ShovelKnight/assets/images/beeto.png', {
-    'idle': (2, 2, 26, 16),
-    'walk': [(2 + 28 * i, 2, 26, 16) for i in range(4)],
-    'flip': (2, 20, 26, 16),
-})
+    def refresh(self):
+        """Rebuild memoized sprites after assets.convert() replaced the image."""
+        self._image = None
+
+        for (tile_id, size) in self.cache:
+            self.cache[(tile_id, size)] = self.load(self.sprites[tile_id], size)
+
+        # Animations hold on to these lists, so swap the frames in place
+        for (tile_id, size), images in self.frames.items():
+            images[:] = [self.load(rect, size) for rect in self.sprites[tile_id]]
+
+        self.variants.clear()
+
+    def variant(self, source, flip=False, alpha=None):
+        """Flipped and/or translucent version of a sprite, built once and reused.
 
-animations = {
-    'walk': Animation(sprites.animation_sprites('walk'), 1, repeat=True),
-}
+        source is either a sprite id or a surface, such as an animation frame.
+        """
+        key = (source, flip, alpha)
+        sprite = self.variants.get(key)
+        if sprite is None:
+            if alpha is not None:
+                sprite = self.variant(source, flip).copy()
+                sprite.set_alpha(alpha)
+            elif flip:
+                sprite = pg_transform.flip(self.variant(source), 1, 0)
+            elif isinstance(source, str):
+                sprite = self.sprite(source)
+            else:
+                sprite = source
+            self.variants[key] = sprite
 
+        return sprite
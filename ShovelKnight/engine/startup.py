@@ -0,0 +1,24 @@
+import time
+
+
+class PhaseTimer:
+    """Splits the time since start into named phases, e.g. for time-to-first-frame."""
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = []  # (name, seconds)
+
+    def mark(self, name):
+        """End the current phase and name it."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.start
+
+    def report(self):
+        lines = [f"{name:<16}{seconds * 1000:9.1f} ms" for name, seconds in self.phases]
+        lines.append(f"{'total':<16}{self.total() * 1000:9.1f} ms")
+        return '\n'.join(lines)
@@ -0,0 +1,51 @@
+from .spatial import TileStore, TileView
+
+
+class TriggerVolumes:
+    """Volumes such as spikes and doors that tell entities when they walk in or out.
+
+    Volumes live in a TileStore, so update(entity) is one spatial query no
+    matter how many there are, and update_all(entities) one bulk query. The entity's on_enter(volume) and
+    on_exit(volume) are only called when the set of volumes it overlaps
+    changes; standing still or walking through empty space fires nothing.
+    """
+
+    def __init__(self):
+        self.volumes = TileStore()
+        self.occupied = {}  # entity -> frozenset of volume indices it overlaps
+
+    def __len__(self):
+        return len(self.volumes)
+
+    def add(self, rect, type):
+        return self.volumes.add(rect, type)
+
+    def update(self, entity):
+        self.occupy(entity, self.volumes.query_indices(entity.rect))
+
+    def update_all(self, entities):
+        """update() every entity, with one bulk query for all their rects."""
+        entities = list(entities)
+        for entity, indices in zip(entities, self.volumes.overlaps([entity.rect for entity in entities])):
+            self.occupy(entity, indices)
+
+    def occupy(self, entity, indices):
+        now = frozenset(indices)
+        before = self.occupied.get(entity, frozenset())
+        if now == before:
+            return
+
+        self.occupied[entity] = now
+        for i in sorted(before - now):
+            entity.on_exit(TileView(self.volumes, i))
+        for i in sorted(now - before):
+            entity.on_enter(TileView(self.volumes, i))
+
+    def inside(self, entity, code):
+        """Whether entity was in a volume of this type as of its last update."""
+        codes = self.volumes.code
+        return any(codes[i] == code for i in self.occupied.get(entity, ()))
+
+    def forget(self, entity):
+        """Drop a despawned entity without firing on_exit."""
+        self.occupied.pop(entity, None)
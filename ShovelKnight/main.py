@@ -1,10 +1,23 @@
+import time
+start_time = time.perf_counter()
+
 from config import *
 from engine import *
+import argparse
 import sys
 import os
 from pygame import Rect
 
-from engine.level import sprites
+from engine.assets import assets
+from engine.background import Background
+from engine.debug import DebugOverlay, debug
+from engine.entity import Entity
+from engine.hud import Hud
+from engine.level import Level, LevelLayout, sprites
+from engine.loader import LevelLoader
+from engine.profiler import FrameProfiler
+from engine.replay import Recorder, Recording, differences
+from engine.startup import PhaseTimer
 
 from camera import Camera
 
@@ -20,17 +33,33 @@ GOLD = (255, 215, 0)
 
 
 class ShovelKnight(Game):
-    def init(self):
+    start_level = 1
+    view_state = None  # what the whole view last showed, for dirty-rect mode
+    prefetch_levels = True  # build the next level in the background
+    level = None
+
+    def init(self, start_level=None):
         
         self.game_state = "running"
-        self.current_level = 1
+        self.current_level = self.start_level if start_level is None else start_level
+        self.kills = 0  # enemies killed on levels already left
         self.max_level = self.find_max_level()
+        # The next level is built in the background while this one is played
+        self.loader = LevelLoader(self.build_level, self.parse_level)
         
         self.reset_game()
+        self.startup.mark('level')
+
+        self.background = Background()
+        self.background.add_layer(sprites.sprite('bg'))
+        self.startup.mark('background')
         
         # Setup fonts
         self.font = pg.font.SysFont('Arial', 36)
         self.small_font = pg.font.SysFont('Arial', 24)
+        self.hud = Hud(self.compose_hud)
+        self.debug_overlay = DebugOverlay()
+        self.startup.mark('fonts')
         
         # Setup music
         pg_mixer.music.set_volume(0.02)
@@ -38,8 +67,9 @@ class ShovelKnight(Game):
         pg_mixer.music.play(loops=-1)
         
         # Load sound effects
-        self.victory_sound = pg_mixer.Sound('ShovelKnight/assets/sounds/knight_land.ogg')  # Use existing sound for victory
-        self.next_level_sound = pg_mixer.Sound('ShovelKnight/assets/sounds/knight_jump.ogg')  # Use existing sound for level transition
+        self.victory_sound = assets.sound('ShovelKnight/assets/sounds/knight_land.ogg')  # Use existing sound for victory
+        self.next_level_sound = assets.sound('ShovelKnight/assets/sounds/knight_jump.ogg')  # Use existing sound for level transition
+        self.startup.mark('audio')
 
     def find_max_level(self): # Finding what the highest level there is by going in the files
         max_level = 1
@@ -57,6 +87,18 @@ class ShovelKnight(Game):
         print(f"Found {max_level} levels")
         return max_level
 
+    def level_file(self, level_num):
+        return f'ShovelKnight/assets/levels/level_{level_num}.txt'
+
+    def parse_level(self, level_file):
+        return LevelLayout(level_file, merge_tiles=MERGE_TILES)
+
+    def build_level(self, level_file, layout=None):
+        return Level(level_file, merge_tiles=MERGE_TILES, active_margin=ACTIVE_MARGIN, layout=layout)
+
+    def shutdown(self):
+        self.loader.shutdown()
+
     def reset_game(self, level_num=None):
         """Reset game to initial state, optionally at a specific level"""
         if level_num is None:
@@ -64,7 +106,7 @@ class ShovelKnight(Game):
         else:
             self.current_level = level_num
             
-        level_file = f'ShovelKnight/assets/levels/level_{level_num}.txt'
+        level_file = self.level_file(level_num)
         
         # Check if level file exists
         if not os.path.exists(level_file):
@@ -76,27 +118,40 @@ class ShovelKnight(Game):
             else:
                 # levels do not exist, quit
                 print("No level files found! Game cannot start.")
+                self.shutdown()
                 pg.quit()
                 sys.exit()
         
-        self.level = Level(level_file)
-        self.add_listener(0)
+        if self.level is not None:
+            self.kills += self.level.kills
+        self.level = self.loader.load(level_file)
+        print(self.loader.report())
+        if self.profiler is not None:
+            self.profiler.add('level load', self.loader.timings[-1][2])
+        if self.prefetch_levels and level_num < self.max_level:
+            self.loader.prefetch(self.level_file(level_num + 1))
         
-        self.camera = Camera()
-        self.camera.pos = [0, 0]
+        self.camera = Camera([0, 0])
         
         self.player = None
-        self.enemies = []
         
         for entity in self.level.entities:
             if isinstance(entity, Knight):
                 self.player = entity
             else: 
-                self.enemies.append(entity)
                 entity.level = self.level
         
         if self.player is None and len(self.level.entities) > 0:
             self.player = self.level.entities[0]
+
+        # The camera follows the player, but it must never be suspended itself
+        if self.player is not None:
+            self.level.activation.pin(self.player)
+        self.level.activation.update(self.camera_view())
+
+        # Only enemies overlapping the player reach check_enemy_collisions
+        self.contacts = []
+        self.level.broadphase.on_pair(Knight, Entity, self.on_player_contact)
             
         self.game_state = "running"
         print(f"Game has been reset to level {self.current_level}!")
@@ -115,69 +170,120 @@ class ShovelKnight(Game):
             print(f"Advancing to level {self.current_level}")
 
     def draw(self):
+        camera_pos = self.camera.lerp_pos(self.alpha)
+
+        if self.dirty is not None:
+            # A scroll or a screen change touches every pixel
+            view_state = (self.game_state, self.level, tuple(camera_pos))
+            if view_state != self.view_state:
+                self.dirty.mark_all()
+            self.view_state = view_state
+
         # Always draw the game background
-        self.surface.blit(sprites.sprite(
-            'bg', size=HALF_WINDOW_SIZE), (0, 0))
+        self.background.draw(self.surface, camera_pos[0])
 
         if self.game_state == "running":
-            view = self.level.map.subsurface(
-                tuple(self.camera.pos) + HALF_WINDOW_SIZE)
+            self.level.map.draw(self.surface, camera_pos, HALF_WINDOW_SIZE)
 
-            self.surface.blit(view, (0, 0))
+            for entity in self.level.activation.awake:
+                drawn = entity.draw(self.surface, offset=(camera_pos[0], 0), alpha=self.alpha)
+                if self.dirty is not None and drawn is not None:
+                    self.dirty.track(entity, drawn, entity.drawn_sprite)
 
-            for entity in self.level.entities:
-                entity.draw(self.surface, offset=(self.camera.pos[0], 0))
-                
+            if debug.enabled:
+                self.debug_overlay.draw(self.surface, self.level.activation.awake, (camera_pos[0], 0))
+                if self.dirty is not None:
+                    # Labels change in place, so repaint both where the overlay was and is
+                    self.dirty.mark(self.debug_overlay.previous)
+                    self.dirty.mark(self.debug_overlay.bounds)
+
+        self.hud.update(self.hud_inputs())
+        self.hud.draw(self.surface)
+        if self.dirty is not None:
+            self.dirty.track(self.hud, self.hud.bounds, self.hud.inputs)
+
+    def hud_inputs(self):
+        """Everything the HUD shows; it is only recomposed when this changes."""
+        if self.game_state == "running":
+            health = getattr(self.player, 'health', None)
+            return (self.game_state, self.current_level, health)
+        return (self.game_state, self.max_level)
+
+    def compose_hud(self, hud):
+        center_x = HALF_WINDOW_SIZE[0] / 2
+        center_y = HALF_WINDOW_SIZE[1] / 2
+
+        if self.game_state == "running":
             if self.player and hasattr(self.player, 'draw_health_bar'):
-                self.player.draw_health_bar(self.surface, 10, 10, 100, 16)
-                
+                health_bar = Surface((100, 16))
+                self.player.draw_health_bar(health_bar, 0, 0, 100, 16)
+                hud.add(health_bar, (10, 10))
+
             # Draw level number
-            level_text = self.small_font.render(f"Level: {self.current_level}", True, BLACK)
-            self.surface.blit(level_text, (10, 30))
-            
-            
+            hud.text(self.small_font, f"Level: {self.current_level}", BLACK, topleft=(10, 30))
+
         elif self.game_state == "game_over":
             # Draw the game over screen
-            game_over_text = self.font.render("GAME OVER", True, RED)
-            restart_text = self.small_font.render("Press R to restart", True, BLACK)
-            quit_text = self.small_font.render("Press Q to quit", True, BLACK)
-            
-            text_rect = game_over_text.get_rect(center=(HALF_WINDOW_SIZE[0] / 2, HALF_WINDOW_SIZE[1] / 2 - 30))
-            restart_rect = restart_text.get_rect(center=(HALF_WINDOW_SIZE[0] / 2, HALF_WINDOW_SIZE[1] / 2 + 10))
-            quit_rect = quit_text.get_rect(center=(HALF_WINDOW_SIZE[0] / 2, HALF_WINDOW_SIZE[1] / 2 + 40))
-            
-            self.surface.blit(game_over_text, text_rect)
-            self.surface.blit(restart_text, restart_rect)
-            self.surface.blit(quit_text, quit_rect)
-            
+            hud.text(self.font, "GAME OVER", RED, center=(center_x, center_y - 30))
+            hud.text(self.small_font, "Press R to restart", BLACK, center=(center_x, center_y + 10))
+            hud.text(self.small_font, "Press Q to quit", BLACK, center=(center_x, center_y + 40))
+
         elif self.game_state == "victory":
             # Draw victory screen
-            victory_text = self.font.render("VICTORY!", True, GOLD)
-            level_complete_text = self.small_font.render(f"All {self.max_level} levels completed!", True, GREEN)
-            restart_text = self.small_font.render("Press R to restart from level 1", True, WHITE)
-            quit_text = self.small_font.render("Press Q to quit", True, WHITE)
-            
-            text_rect = victory_text.get_rect(center=(HALF_WINDOW_SIZE[0] / 2, HALF_WINDOW_SIZE[1] / 2 - 40))
-            level_rect = level_complete_text.get_rect(center=(HALF_WINDOW_SIZE[0] / 2, HALF_WINDOW_SIZE[1] / 2))
-            restart_rect = restart_text.get_rect(center=(HALF_WINDOW_SIZE[0] / 2, HALF_WINDOW_SIZE[1] / 2 + 30))
-            quit_rect = quit_text.get_rect(center=(HALF_WINDOW_SIZE[0] / 2, HALF_WINDOW_SIZE[1] / 2 + 60))
-            
-            self.surface.blit(victory_text, text_rect)
-            self.surface.blit(level_complete_text, level_rect)
-            self.surface.blit(restart_text, restart_rect)
-            self.surface.blit(quit_text, quit_rect)
+            hud.text(self.font, "VICTORY!", GOLD, center=(center_x, center_y - 40))
+            hud.text(self.small_font, f"All {self.max_level} levels completed!", GREEN, center=(center_x, center_y))
+            hud.text(self.small_font, "Press R to restart from level 1", WHITE, center=(center_x, center_y + 30))
+            hud.text(self.small_font, "Press Q to quit", WHITE, center=(center_x, center_y + 60))
+
+    def on_player_contact(self, player, other):
+        if player is self.player:
+            self.contacts.append(other)
+
+    def summary(self):
+        player = self.player
+        return {
+            'game_state': self.game_state,
+            'level': self.current_level,
+            'player': list(player.rect.topleft) if player else None,
+            'health': getattr(player, 'health', None),
+            'kills': self.kills + self.level.kills,
+        }
+
+    def camera_view(self):
+        return Rect(self.camera.pos[0], self.camera.pos[1], *HALF_WINDOW_SIZE)
+
+    def save_state(self):
+        # Suspended entities don't move; they save their state when they wake up
+        for entity in self.level.activation.awake:
+            entity.save_state()
+        self.camera.save_state()
+
+    def update_entities(self, awake):
+        """Update the awake entities; when profiling, charge each one's time to its type."""
+        profiler = self.profiler
+        tiles = self.level.tiles
+        batch = self.level.enemy_batch
+        if batch is not None:
+            if profiler is None:
+                batch.step(batch.mask(awake))
+            else:
+                profiler.timed('update BeetoBatch', batch.step, batch.mask(awake))
 
-        self.screen.blit(pg_transform.scale(self.surface, WINDOW_SIZE), (0, 0))
+        for entity in awake:
+            if profiler is None:
+                entity.update(tiles, self.step_time)
+            else:
+                profiler.timed(f'update {type(entity).__name__}', entity.update, tiles, self.step_time)
 
     def update(self):
         # Check for restart and quit keys
-        keys = pg.key.get_pressed()
+        keys = self.input.snapshot
         
         # Handle quitting regardless of game state
         if keys[pg.K_q] or keys[pg.K_ESCAPE]:
             print("Quit key pressed - exiting game")
-            pg.quit()
-            sys.exit()
+            self.quit()
+            return
             
         # Handle restart in game over or victory state
         if (self.game_state == "game_over" or self.game_state == "victory") and keys[pg.K_r]:
@@ -187,19 +293,20 @@ class ShovelKnight(Game):
             return
         
         if self.game_state == "running":
-            # Update all entities first
-            for entity in self.level.entities:
-                entity.update(self.level.tiles)
+            # Update the entities near the camera first; the rest stay suspended
+            awake = self.level.activation.update(self.camera_view())
+            self.update_entities(awake)
+            self.level.activation.moved()
                 
             # Now handle player-enemy interactions
+            self.contacts = []
+            self.level.broadphase.update(awake)
+            # Fires on_enter/on_exit for spikes and doors; suspended entities catch up when they wake
+            self.level.triggers.update_all(awake)
             if self.player and hasattr(self.player, 'check_enemy_collisions'):
-                # Pass the current list of enemies
-                current_enemies = [e for e in self.level.entities if e != self.player]
-                self.player.check_enemy_collisions(current_enemies)
-                self.player.check_hazard_collisions(self.level.spikes)
-                
-                # Update our enemies list
-                self.enemies = current_enemies
+                # Pass the enemies the broadphase found near the player
+                self.player.check_enemy_collisions(self.contacts)
+                self.player.check_hazard_collisions()
                 
             if self.player and self.level.check_win_condition(self.player):
                 print("WIN condition met! Player touched win trigger.")
@@ -219,16 +326,95 @@ class ShovelKnight(Game):
         # Handle quit event
         if event.type == pg.QUIT:
             print("Quit event detected!")
-            pg.quit()
-            sys.exit()
+            self.quit()
+            return
         
-        # Process other events only in running state
+        # Process other events only in running state; suspended entities miss them
         if self.game_state == "running":
-            for entity in self.level.entities:
-                if hasattr(entity, 'on_event'):
-                    entity.on_event(event)
+            for entity in self.level.activation.awake:
+                entity.on_event(event)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument('--headless', action='store_true',
+                        help='simulate without a display or frame cap and report throughput')
+    parser.add_argument('--frames', type=int, default=3600,
+                        help='number of update steps to simulate in headless mode')
+    parser.add_argument('--render-fps', type=int, default=None,
+                        help='rendered frames per second, 0 for uncapped (defaults to the simulation rate)')
+    parser.add_argument('--level', type=int, default=1,
+                        help='level to start on')
+    parser.add_argument('--until', choices=('game_over', 'victory', 'level_change'),
+                        help='stop the headless run early when this happens')
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help='only scale and present the parts of the screen that changed')
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='report time to first frame broken down by phase, then exit')
+    parser.add_argument('--debug', action='store_true',
+                        help='log gameplay debug messages and draw hitboxes and labels')
+    parser.add_argument('--profile', action='store_true',
+                        help='time every frame by phase; F3 shows the graph, F4 dumps the recent frames')
+    parser.add_argument('--profile-frames', type=int, default=300,
+                        help='number of recent frames the profiler keeps')
+    parser.add_argument('--profile-out', default=Game.profile_path,
+                        help='file the profile is dumped to, as JSON for .json and CSV otherwise')
+    parser.add_argument('--record', metavar='PATH',
+                        help='record every step\'s input to PATH, with the state the game ends in')
+    parser.add_argument('--replay', metavar='PATH',
+                        help='replay a --record file headlessly and check the game ends in the same state')
+    args = parser.parse_args(argv)
+
+    debug.enabled = args.debug
+
+    startup = PhaseTimer(start_time)
+    startup.mark('imports')
+
+    # Create and run the game
+    profiler = FrameProfiler(args.profile_frames) if args.profile else None
+    recording = Recording.load(args.replay) if args.replay else None
+    game = ShovelKnight(TITLE, WINDOW_SIZE, fps=FPS, headless=args.headless or recording is not None,
+                       render_fps=args.render_fps, startup=startup, dirty_rects=args.dirty_rects,
+                       profiler=profiler)
+    game.start_level = args.level
+    game.profile_path = args.profile_out
+    if args.startup_profile:
+        # A level being parsed in the background would skew the phases
+        game.prefetch_levels = False
+    if args.record:
+        game.recorder = Recorder(args.record, FPS, args.level)
+
+    if recording is not None:
+        if recording.fps != FPS:
+            print(f"Recorded at {recording.fps} steps/s, but the game runs at {FPS}")
+            return 1
+        steps, elapsed, state = game.replay(recording)
+        speed = steps / FPS / elapsed if elapsed > 0 else float('inf')
+        print(f"Replayed {steps} steps in {elapsed:.3f}s ({speed:.1f}x real time)")
+        mismatches = differences(recording.state, state)
+        for key, expected, actual in mismatches:
+            print(f"Mismatch in {key}: recorded {expected}, replayed {actual}")
+        print("Replay diverged from the recording" if mismatches else "Replay matches the recording")
+        return 1 if mismatches else 0
+    elif args.startup_profile:
+        print(game.first_frame().report())
+        game.shutdown()
+        pg.quit()
+    elif args.headless:
+        conditions = {
+            'game_over': lambda g: g.game_state == "game_over",
+            'victory': lambda g: g.game_state == "victory",
+            'level_change': lambda g: g.current_level != args.level,
+        }
+        frames, elapsed, fps = game.simulate(args.frames, conditions.get(args.until))
+        print(f"Simulated {frames} frames in {elapsed:.3f}s ({fps:.1f} frames/s)")
+        print(f"Asset cache: {assets.stats()}")
+        if profiler is not None:
+            print(profiler.report())
+            print(f"Frame profile written to {profiler.dump(game.profile_path)}")
+    else:
+        game.run()
 
 
-# Create and run the game
-game = ShovelKnight(TITLE, WINDOW_SIZE, fps=FPS)
-game.run()
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
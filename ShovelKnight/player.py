@@ -1,5 +1,9 @@
 from engine import *
+from engine.assets import assets
+from engine.debug import debug
+from engine.input import inputs
 from engine.entity import Entity
+from engine.spatial import LADDER, SPIKE, WIN_TRIGGER
 import engine.game
 
 from config import FPS
@@ -15,16 +19,18 @@ sprites = SpriteSheet('ShovelKnight/assets/images/knight.png', {
     'hurt': (2, 258, 33, 32),
 })
 
-animations = {
-    'walk': Animation(sprites.animation_sprites('walk'), duration=0.5, repeat=True),
-    'slash': Animation(sprites.animation_sprites('slash'), duration=0.5, repeat=False, flip_offset=(20, 0)),
-    'climb': Animation(sprites.animation_sprites('climb'), duration=0.4, repeat=True),  
-}
+
+def load_animations():
+    return {
+        'walk': AnimationClip(sprites.animation_sprites('walk'), duration=0.5, repeat=True),
+        'slash': AnimationClip(sprites.animation_sprites('slash'), duration=0.5, repeat=False, flip_offset=(20, 0)),
+        'climb': AnimationClip(sprites.animation_sprites('climb'), duration=0.4, repeat=True),  
+    }
 
 
 class Knight(Entity):
     def __init__(self, rect=Rect(0, 0, 0, 0)):
-        super().__init__(rect, sprites=sprites, animations=animations)
+        super().__init__(rect, sprites=sprites, animations=assets.memo('knight_animations', load_animations))
 
         self.grounded = True
         self.falling = False
@@ -38,6 +44,7 @@ class Knight(Entity):
         self.invulnerable = False
         self.invulnerable_timer = 0
         self.invulnerable_duration = 1.0
+        self.hazards = set()  # indices of the spike volumes we are standing in
 
         # Attack hitbox properties
         self.attacking = False
@@ -47,30 +54,26 @@ class Knight(Entity):
         
         self.original_rect_width = rect.width if rect.width > 0 else 32
         self.ladder_rect_width = 10
-        
-        # Debug flag - ENSURE THIS IS TRUE
-        self.debug_mode = False
 
         self.set_sprite('idle')
 
-        self.slash_sound = pg_mixer.Sound('ShovelKnight/assets/sounds/knight_slash.ogg')  
-        self.jump_sound = pg_mixer.Sound('ShovelKnight/assets/sounds/knight_jump.ogg')
-        self.land_sound = pg_mixer.Sound('ShovelKnight/assets/sounds/knight_land.ogg')
-        self.slash_sound.set_volume(0.1)
-        self.jump_sound.set_volume(0.1)
-        self.land_sound.set_volume(0.1)
+        self.slash_sound = assets.sound('ShovelKnight/assets/sounds/knight_slash.ogg', volume=0.1)
+        self.jump_sound = assets.sound('ShovelKnight/assets/sounds/knight_jump.ogg', volume=0.1)
+        self.land_sound = assets.sound('ShovelKnight/assets/sounds/knight_land.ogg', volume=0.1)
 
     def on_event(self, event):
         if event.type == KEYDOWN:
             if event.key == K_a:
                 self.flip = True
-                print(f"Moving left, flip = {self.flip}")  # Add this line
+                if debug.enabled:
+                    debug.log(f"Moving left, flip = {self.flip}")
                 self.vx = -10
                 if self.grounded:
                     self.set_animation('walk')
             if event.key == K_d:
                 self.flip = False
-                print(f"Moving right, flip = {self.flip}")  # Add this line
+                if debug.enabled:
+                    debug.log(f"Moving right, flip = {self.flip}")
                 self.vx = 10
                 if self.grounded:
                     self.set_animation('walk')
@@ -90,8 +93,8 @@ class Knight(Entity):
                     self.exit_ladder_mode()  # Use helper method
                     self.animation = None
                     self.set_sprite('jump')
-                    if self.debug_mode:
-                        print("Jumped off ladder")
+                    if debug.enabled:
+                        debug.log("Jumped off ladder")
 
             elif event.key == K_SPACE and self.grounded:
                 self.jump_sound.play()
@@ -99,8 +102,8 @@ class Knight(Entity):
                 self.grounded = False
                 self.animation = None
                 self.set_sprite('jump')
-                if self.debug_mode:
-                    print("Normal jump")
+                if debug.enabled:
+                    debug.log("Normal jump")
                             
             if event.key == K_s:
                 if not self.grounded:
@@ -108,8 +111,8 @@ class Knight(Entity):
                     self.attack_type = 'down_thrust'
                     self.set_sprite('down_thrust')
             if event.key == K_f:
-                if self.debug_mode:
-                    print("Space pressed - Starting shovel attack")
+                if debug.enabled:
+                    debug.log("Space pressed - Starting shovel attack")
                     
                 if self.attacking:
                     self.attacking = False
@@ -139,37 +142,26 @@ class Knight(Entity):
 
 
     def find_nearby_ladder(self, tiles, max_distance=20):  # Reduced from 40 to 20
-        for tile in tiles:
-            if tile.type == 'ladder':
-                # Check horizontal distance to ladder center
-                ladder_center_x = tile.rect.centerx
-                player_center_x = self.rect.centerx
-                horizontal_distance = abs(ladder_center_x - player_center_x)
-                
-                # Check if player overlaps vertically with ladder
-                player_bottom = self.rect.bottom
-                player_top = self.rect.top
-                ladder_bottom = tile.rect.bottom
-                ladder_top = tile.rect.top
-                
-                # More strict vertical overlap check
-                vertical_overlap = (player_bottom >= ladder_top and player_top <= ladder_bottom)
-                
-                if horizontal_distance <= max_distance and vertical_overlap:
-                    return tile
-        return None
+        # Nearest ladder whose center is within reach and that overlaps us vertically
+        return tiles.nearest(LADDER, self.rect.centerx, self.rect.top, self.rect.bottom, max_distance)
+
+    def ladder_at(self, tiles):
+        """First ladder tile touching the player, if any."""
+        ladders = tiles.query(self.rect, LADDER)
+        return ladders[0] if ladders else None
 
     def move(self, tiles):
         self.collision = {'left': False, 'right': False,
                     'top': False, 'bottom': False}
+        debugging = debug.enabled  # checked once, not per tile
     
         # Check for UP key press to grab ladder
-        keys = pg.key.get_pressed()
+        keys = inputs.snapshot
         if keys[K_w] and not self.laddering:
             nearby_ladder = self.find_nearby_ladder(tiles, max_distance=15)
             if nearby_ladder:
-                if self.debug_mode:
-                    print("Grabbing ladder!")
+                if debugging:
+                    debug.log("Grabbing ladder!")
                 # Snap to ladder center and make hitbox smaller
                 self.rect.centerx = nearby_ladder.rect.centerx
                 self.rect.width = self.ladder_rect_width
@@ -180,11 +172,7 @@ class Knight(Entity):
         
         # Check if we should exit ladder mode (when not pressing UP/DOWN and moving horizontally)
         if self.laddering and (keys[K_a] or keys[K_d]) and not (keys[K_w] or keys[K_s]):
-            current_ladder = None
-            for tile in tiles:
-                if tile.type == 'ladder' and self.rect.colliderect(tile.rect):
-                    current_ladder = tile
-                    break
+            current_ladder = self.ladder_at(tiles)
             
             # If we're moving away from the ladder horizontally, exit ladder mode
             if not current_ladder:
@@ -196,18 +184,18 @@ class Knight(Entity):
             hit_list = self.collisions(tiles)
 
             for tile in hit_list:
-                if tile.type not in ('ladder', 'win_trigger'):
+                if tile.code not in (LADDER, WIN_TRIGGER):
                     if self.vx > 0:
-                        self.rect.right = tile.rect.left
+                        self.rect.right = tile.left
                         self.collision['right'] = True
                     elif self.vx < 0:
-                        self.rect.left = tile.rect.right
+                        self.rect.left = tile.right
                         self.collision['left'] = True
                     
-                    if self.debug_mode:
-                        print(f"Horizontal collision with {tile.type}")
-                elif tile.type == 'win_trigger' and self.debug_mode:
-                    print(f"Win trigger detected at {tile.rect}")
+                    if debugging:
+                        debug.log(f"Horizontal collision with {tile.type}")
+                elif tile.code == WIN_TRIGGER and debugging:
+                    debug.log(f"Win trigger detected at {tile.rect}")
 
         # Handle vertical movement
         if self.laddering:
@@ -217,15 +205,11 @@ class Knight(Entity):
             self.center_on_ladder(tiles)
             
             # Check if we've left the ladder bounds
-            current_ladder = None
-            for tile in tiles:
-                if tile.type == 'ladder' and self.rect.colliderect(tile.rect):
-                    current_ladder = tile
-                    break
+            current_ladder = self.ladder_at(tiles)
             
             if not current_ladder:
-                if self.debug_mode:
-                    print("Left ladder bounds")
+                if debugging:
+                    debug.log("Left ladder bounds")
                 self.exit_ladder_mode()
                 if self.vy < 0:
                     self.grounded = True
@@ -249,15 +233,15 @@ class Knight(Entity):
         # Process standard tile collisions
         for tile in hit_list:
             # Don't block movement on win triggers or ladders
-            if tile.type != 'ladder' and tile.type != 'win_trigger':
+            if tile.code != LADDER and tile.code != WIN_TRIGGER:
                 if self.vy > 0:
-                    self.rect.bottom = tile.rect.top
+                    self.rect.bottom = tile.top
                     self.collision['bottom'] = True
                 elif self.vy < 0:
-                    self.rect.top = tile.rect.bottom
+                    self.rect.top = tile.bottom
                     self.collision['top'] = True
-            elif tile.type == 'win_trigger' and self.debug_mode:
-                print(f"Player rect: {self.rect}, Win trigger: {tile.rect}")
+            elif tile.code == WIN_TRIGGER and debugging:
+                debug.log(f"Player rect: {self.rect}, Win trigger: {tile.rect}")
         
         # Handle transition to falling state
         if not self.falling and self.vy > 0 and not self.grounded and not self.laddering:
@@ -291,23 +275,29 @@ class Knight(Entity):
         if self.laddering:
             self.laddering = False
             self.rect.width = self.original_rect_width  
-            if self.debug_mode:
-                print("Exited ladder mode, hitbox restored")
-
-    def check_hazard_collisions(self, spikes):      
-        if not self.invulnerable:                   
-            spike_hit = self.collisions(spikes)     
-            if spike_hit:
-                self.take_damage(100)
-                return True
+            if debug.enabled:
+                debug.log("Exited ladder mode, hitbox restored")
+
+    def on_enter(self, volume):
+        if volume.code == SPIKE:
+            self.hazards.add(volume.index)
+
+    def on_exit(self, volume):
+        self.hazards.discard(volume.index)
+
+    def check_hazard_collisions(self):
+        # Still standing on spikes when invulnerability runs out hurts too
+        if not self.invulnerable and self.hazards:
+            self.take_damage(100)
+            return True
         return False
     
     def check_enemy_collisions(self, enemies):
         # Debug info about enemies
-        if self.debug_mode:
-            print(f"Checking enemy collisions, enemies count: {len(enemies)}")
+        if debug.enabled:
+            debug.log(f"Checking enemy collisions, enemies count: {len(enemies)}")
             for i, enemy in enumerate(enemies):
-                print(f"Enemy {i}: Position: {enemy.rect.topleft}, Dead: {enemy.dead}")
+                debug.log(f"Enemy {i}: Position: {enemy.rect.topleft}, Dead: {enemy.dead}")
         
         # Early return if player is dead
         if self.dead:
@@ -319,14 +309,15 @@ class Knight(Entity):
         if self.down_attack and self.vy > 0:
             for enemy in enemies:
                 if not getattr(enemy, 'dead', False) and self.rect.colliderect(enemy.rect) and self.rect.bottom < enemy.rect.centery:
-                    print(f"Down thrust hit enemy!")
+                    if debug.enabled:
+                        debug.log("Down thrust hit enemy!")
                     enemy.take_damage(self.attack_damage)
                     self.vy = -20
         
         # CRUCIAL: Check for shovel attack damage
         if self.attacking and self.animation:
-            if self.debug_mode:
-                print(f"Slash animation active: frame {self.animation.frame}")
+            if debug.enabled:
+                debug.log(f"Slash animation active: frame {self.animation.frame}")
             
             # Create attack hitbox
             self.update_attack_hitbox()
@@ -334,7 +325,8 @@ class Knight(Entity):
             # Check collision with all enemies
             for enemy in enemies:
                 if not getattr(enemy, 'dead', False) and self.attack_hitbox and self.attack_hitbox.colliderect(enemy.rect):
-                    print(f"SHOVEL HIT ENEMY!")
+                    if debug.enabled:
+                        debug.log("SHOVEL HIT ENEMY!")
                     enemy.take_damage(self.attack_damage)  # Apply damage to the enemy
         
         # Check if player gets hit by enemies
@@ -347,6 +339,12 @@ class Knight(Entity):
         
         return player_took_damage
     
+    def bounds(self):
+        # Enemies within reach of the shovel count as well as touching ones
+        if self.attack_hitbox:
+            return self.rect.union(self.attack_hitbox)
+        return self.rect
+
     def update_attack_hitbox(self):
         """Update the attack hitbox based on player direction and current sprite"""
         # Create hitbox during slash animation, no matter which frame
@@ -370,8 +368,8 @@ class Knight(Entity):
                 self.attack_hitbox = None
 
             
-            if self.debug_mode:
-                print(f"Attack hitbox created: {self.attack_hitbox}")
+            if debug.enabled:
+                debug.log(f"Attack hitbox created: {self.attack_hitbox}")
         elif self.down_attack:
             # Create hitbox for down attack
             hitbox_width = 30
@@ -381,8 +379,8 @@ class Knight(Entity):
             
             self.attack_hitbox = Rect(hitbox_x, hitbox_y, hitbox_width, hitbox_height)
             
-            if self.debug_mode:
-                print(f"Down attack hitbox: {self.attack_hitbox}")
+            if debug.enabled:
+                debug.log(f"Down attack hitbox: {self.attack_hitbox}")
         else:
             self.attack_hitbox = None
     
@@ -427,8 +425,8 @@ class Knight(Entity):
         
         pg.draw.rect(surface, (0, 0, 0), background_rect, 2)
         
-    def update(self, tiles):
-        super().update(tiles)
+    def update(self, tiles, elapsed):
+        super().update(tiles, elapsed)
         
         # Store previous animation state to detect when animation completes
         if hasattr(self, 'previous_frame') and self.animation:
@@ -444,13 +442,13 @@ class Knight(Entity):
             # Get total frames in the slash animation
             total_frames = len(sprites.animation_sprites('slash'))
             
-            if self.debug_mode:
-                print(f"Animation frame: {self.animation.frame}, Total frames: {total_frames}")
+            if debug.enabled:
+                debug.log(f"Animation frame: {self.animation.frame}, Total frames: {total_frames}")
                 
             # If we're at the last frame or animation changed/disappeared
             if self.animation.frame >= total_frames - 1:
-                if self.debug_mode:
-                    print("Slash animation complete!")
+                if debug.enabled:
+                    debug.log("Slash animation complete!")
                 self.attacking = False
                 self.attack_hitbox = None
                 self.attack_type = None
@@ -470,21 +468,18 @@ class Knight(Entity):
                 
     def center_on_ladder(self, tiles):
         if self.laddering:
-            current_ladder = None
-            for tile in tiles:
-                if tile.type == 'ladder' and self.rect.colliderect(tile.rect):
-                    current_ladder = tile
-                    break
+            current_ladder = self.ladder_at(tiles)
             
             if current_ladder:
                 # Center the player's hitbox on the ladder
                 self.rect.centerx = current_ladder.rect.centerx
-                if self.debug_mode:
-                    print(f"Centered on ladder: player centerx={self.rect.centerx}, ladder centerx={current_ladder.rect.centerx}")
+                if debug.enabled:
+                    debug.log(f"Centered on ladder: player centerx={self.rect.centerx}, ladder centerx={current_ladder.rect.centerx}")
                     
-    def draw(self, surface, offset=(0, 0)):
-        sprite_x = self.rect.x - offset[0]
-        sprite_y = self.rect.y - offset[1]
+    def draw(self, surface, offset=(0, 0), alpha=1.0):
+        x, y = self.lerp_pos(alpha)
+        sprite_x = x - offset[0]
+        sprite_y = y - offset[1]
 
         # If on ladder, adjust sprite position to center it with the narrow hitbox
         if self.laddering:
@@ -505,48 +500,25 @@ class Knight(Entity):
                 flash_rate = 10  # flashes per second
                 flash_time = self.invulnerable_timer * flash_rate
                 if int(flash_time) % 2:  # Flash on/off
-                    # Create a copy of the sprite with reduced alpha
-                    temp_sprite = sprite.copy()
-                    temp_sprite.set_alpha(128)  # Semi-transparent
-                    surface.blit(temp_sprite, (sprite_x, sprite_y))
-                else:
-                    surface.blit(sprite, (sprite_x, sprite_y))
-            else:
-                surface.blit(sprite, (sprite_x, sprite_y))
-
-        # Debug visualization (attack hitbox)
-        if self.attack_hitbox and self.debug_mode:
-            debug_hitbox = Rect(
-                self.attack_hitbox.x - offset[0],
-                self.attack_hitbox.y - offset[1],
-                self.attack_hitbox.width,
-                self.attack_hitbox.height
-            )
-            
-            pg.draw.rect(surface, (255, 0, 0), debug_hitbox, 2)
-            hitbox_fill = debug_hitbox.copy()
-            hitbox_surface = pg.Surface((hitbox_fill.width, hitbox_fill.height), pg.SRCALPHA)
-            hitbox_surface.fill((255, 0, 0, 64))  
-            surface.blit(hitbox_surface, (hitbox_fill.x, hitbox_fill.y))
-            
-        # Debug visualization (character hitbox)
-        if self.debug_mode:
-            char_hitbox = Rect(
-                self.rect.x - offset[0],
-                self.rect.y - offset[1],
-                self.rect.width,
-                self.rect.height
-            )
-            hitbox_color = (0, 255, 255) if self.laddering else (0, 255, 0)  
-            pg.draw.rect(surface, hitbox_color, char_hitbox, 1)
-            
-            # Status text with flip state for debugging
-            ladder_status = f"On Ladder (W:{self.rect.width})" if self.laddering else f"Normal (W:{self.rect.width})"
-            flip_status = f" | Flip: {self.flip}"
-            status_text = ladder_status + flip_status
-            status_color = (0, 255, 0) if self.laddering else (255, 255, 255)
-            status_display = pg.font.SysFont('Arial', 12).render(status_text, True, status_color)
-            surface.blit(status_display, (self.rect.x - offset[0], self.rect.y - offset[1] - 20))
+                    # Semi-transparent copy of the sprite, cached by the sheet
+                    sprite = self.sprites.variant(*self.sprite_key, alpha=128)
+            self.drawn_sprite = sprite
+            return surface.blit(sprite, (sprite_x, sprite_y))
+
+        self.drawn_sprite = sprite
+        return None
+
+    def debug_info(self):
+        boxes = []
+        if self.attack_hitbox:
+            boxes.append((self.attack_hitbox, (255, 0, 0), 2, (255, 0, 0, 64)))
+        hitbox_color = (0, 255, 255) if self.laddering else (0, 255, 0)
+        boxes.append((self.rect, hitbox_color, 1, None))
+
+        # Status text with flip state for debugging
+        ladder_status = f"On Ladder (W:{self.rect.width})" if self.laddering else f"Normal (W:{self.rect.width})"
+        status_color = (0, 255, 0) if self.laddering else (255, 255, 255)
+        return boxes, f"{ladder_status} | Flip: {self.flip}", status_color
 
     def update_sprite_flip(self):
         """Call this whenever you change the flip state to refresh the sprite"""
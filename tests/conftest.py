@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The game loads its assets relative to the repository root and imports its
+# modules from ShovelKnight/, the way `python ShovelKnight/main.py` runs it
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+os.chdir(ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'ShovelKnight'))
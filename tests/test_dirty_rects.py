@@ -0,0 +1,29 @@
+import pygame as pg
+
+import main
+
+
+def test_invulnerability_flash_reaches_the_screen():
+    game = main.ShovelKnight(main.TITLE, main.WINDOW_SIZE, headless=True, dirty_rects=True)
+    game.init()
+
+    # Let the knight land, then stand still while invulnerable
+    for _ in range(60):
+        game.save_state()
+        game.step()
+    player = game.player
+    player.invulnerable = True
+    player.invulnerable_timer = player.invulnerable_duration
+
+    stale = 0
+    for _ in range(50):
+        game.save_state()
+        game.step()
+        game.draw()
+        game.present()
+        expected = pg.transform.scale(game.surface, main.WINDOW_SIZE)
+        if pg.image.tostring(expected, 'RGB') != pg.image.tostring(game.screen, 'RGB'):
+            stale += 1
+
+    assert player.invulnerable
+    assert stale == 0
@@ -0,0 +1,46 @@
+import threading
+
+from engine.loader import LevelLoader
+
+
+def test_load_waits_for_a_running_prefetch():
+    started = threading.Event()
+    release = threading.Event()
+    parsed = []
+
+    def parse(path):
+        started.set()
+        release.wait(5)
+        parsed.append(path)
+        return 'layout'
+
+    loader = LevelLoader(lambda path, layout: (path, layout), parse)
+    loader.prefetch('level_1.txt')
+    assert started.wait(5)
+    threading.Timer(0.05, release.set).start()
+
+    assert loader.load('level_1.txt') == ('level_1.txt', 'layout')
+    assert parsed == ['level_1.txt']
+    assert loader.timings[-1][1] == 'prefetch'
+    loader.shutdown()
+
+
+def test_load_drops_a_queued_prefetch():
+    release = threading.Event()
+    parsed = []
+
+    def parse(path):
+        if path == 'level_1.txt':
+            release.wait(5)
+        parsed.append(path)
+        return 'layout'
+
+    loader = LevelLoader(lambda path, layout: (path, layout), parse)
+    loader.prefetch('level_1.txt')
+    loader.prefetch('level_2.txt')  # queued behind level 1 on the one worker
+
+    assert loader.load('level_2.txt') == ('level_2.txt', None)
+    assert loader.timings[-1][1] == 'sync'
+    release.set()
+    loader.shutdown()
+    assert 'level_2.txt' not in parsed
@@ -0,0 +1,73 @@
+import pygame as pg
+import pytest
+
+import main
+
+# A ladder through a floor row, with a tall wall nearby that a merged rect
+# could push the knight on top of
+LEVEL = '\n'.join([
+    "          |                   ",
+    "          |                   ",
+    "          |                   ",
+    "          |                   ",
+    "          |                   ",
+    "          |                   ",
+    "          |                   ",
+    "[=========[=====H======..====]",
+    "|               H            |",
+    "|               H            |",
+    "|   P           H            |",
+    "[=============================]",
+])
+
+
+class LadderGame(main.ShovelKnight):
+    path = None
+    prefetch_levels = False
+
+    def level_file(self, level_num):
+        return self.path
+
+    def find_max_level(self):
+        return 1
+
+
+def dismount_trace(path, merge, release, direction, monkeypatch):
+    """Walk to the ladder, climb it, then jump off sideways inside the floor row."""
+    monkeypatch.setattr(main, 'MERGE_TILES', merge)
+    LadderGame.path = path
+    game = LadderGame(main.TITLE, main.WINDOW_SIZE, headless=True)
+    game.input.reset()
+    game.init()
+
+    script = {
+        0: (pg.KEYDOWN, pg.K_d), 95: (pg.KEYUP, pg.K_d),
+        96: (pg.KEYDOWN, pg.K_w), 98: (pg.KEYUP, pg.K_w),  # grab the ladder
+        100: (pg.KEYDOWN, pg.K_w), release: (pg.KEYUP, pg.K_w),  # climb
+        release + 1: (pg.KEYDOWN, direction), release + 5: (pg.KEYDOWN, pg.K_SPACE),
+    }
+    trace = []
+    for n in range(300):
+        if n in script:
+            kind, key = script[n]
+            game.input.feed([pg.event.Event(kind, key=key)])
+        game.step()
+        player = game.player
+        trace.append((tuple(player.rect), player.laddering, player.vx, player.vy))
+    game.shutdown()
+    return trace
+
+
+@pytest.mark.parametrize('direction', [pg.K_a, pg.K_d])
+@pytest.mark.parametrize('release', [112, 118, 124])
+def test_ladder_dismount_same_with_merged_tiles(tmp_path, monkeypatch, direction, release):
+    path = tmp_path / 'level_1.txt'
+    path.write_text(LEVEL)
+
+    per_cell = dismount_trace(str(path), False, release, direction, monkeypatch)
+    merged = dismount_trace(str(path), True, release, direction, monkeypatch)
+
+    # The knight really climbed and left the ladder
+    assert any(laddering for _, laddering, _, _ in per_cell)
+    assert not per_cell[-1][1]
+    assert merged == per_cell
@@ -0,0 +1,19 @@
+import random
+
+from pygame import Rect
+
+from engine.spatial import BLOCK, SPIKE, TileStore
+
+
+def test_overlaps_matches_query_indices():
+    rnd = random.Random(3)
+    store = TileStore()
+    for _ in range(300):
+        store.add(Rect(rnd.randrange(-64, 640), rnd.randrange(-64, 480),
+                       rnd.randrange(1, 80), rnd.randrange(1, 80)), rnd.choice((BLOCK, SPIKE)))
+    rects = [Rect(rnd.randrange(-80, 660), rnd.randrange(-80, 500),
+                  rnd.randrange(0, 60), rnd.randrange(0, 60)) for _ in range(200)]
+
+    for code in (None, SPIKE):
+        assert store.overlaps(rects, code) == [store.query_indices(rect, code) for rect in rects]
+    assert store.overlaps([]) == []